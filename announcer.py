@@ -1,25 +1,95 @@
 import os
 import json
+import threading
 from datetime import datetime
 from typing import Dict, List, Any, Optional, Union
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from jinja2 import Environment, FileSystemLoader, Template, TemplateNotFound, select_autoescape
 
 class HockeyAnnouncer:
     """
     Converts hockey game events into natural language announcements
     using customizable templates.
+    
+    The announcer holds compiled templates and lookup maps for every configured
+    language side by side. The language is chosen per call, so a single instance
+    can be shared between threads serving different languages.
     """
     
-    def __init__(self, templates_dir: str = "templates", language: str = "en"):
+    # Template file prefix for each announcement kind and the template used
+    # when the language specific one does not exist
+    TEMPLATE_FALLBACKS = {
+        "goal": "goal.en.j2",
+        "penalty": "penalty.en.j2",
+        "timeout": "timeout.en.j2",
+        "goalie_in": "goalie_in.en.j2",
+        "goalie_out": "goalie_out.en.j2",
+        "welcome": "timeout.en.j2",
+        "lineups": "timeout.en.j2"
+    }
+    
+    PERIOD_NAMES = {
+        "en": {
+            1: "in the 1st period",
+            2: "in the 2nd period",
+            3: "in the 3rd period",
+            4: "in overtime",
+            5: "in the shootout"
+        },
+        "sv": {
+            1: "i första perioden",
+            2: "i andra perioden",
+            3: "i tredje perioden",
+            4: "i förlängningen",
+            5: "i straffläggningen"  # Shootout
+        }
+    }
+    
+    STRENGTH_MAP = {
+        "en": {
+            "EQ": "at even strength",
+            "PP1": "on the power play",
+            "PP2": "on a 5-on-3 power play",
+            "SH1": "shorthanded",
+            "SH2": "on a 3-on-5 penalty kill"
+        },
+        "sv": {
+            "EQ": "i lika styrka",
+            "PP1": "i numerärt överläge",
+            "PP2": "i 5 mot 3-spel",
+            "SH1": "i numerärt underläge",
+            "SH2": "i 3 mot 5-spel"
+        }
+    }
+    
+    CONTEXT_MAP = {
+        "en": {
+            "takes_lead": "takes the lead",
+            "extends_lead": "extends their lead",
+            "equalizes": "ties the game",
+            "reduces_deficit": "cuts the deficit"
+        },
+        "sv": {
+            "takes_lead": "tar",
+            "extends_lead": "utökar",
+            "equalizes": "kvitterar",
+            "reduces_deficit": "reducerar"
+        }
+    }
+    
+    def __init__(self, templates_dir: str = "templates", language: str = "en",
+                 languages: Optional[List[str]] = None, preload: bool = True):
         """
         Initialize the announcer with templates directory and language.
         
         Args:
             templates_dir: Directory containing announcement templates
-            language: Language code for announcements (e.g., 'en', 'sv')
+            language: Default language code for announcements (e.g., 'en', 'sv')
+            languages: All language codes to precompile templates for
+            preload: Compile the templates now instead of on first use
         """
         self.templates_dir = templates_dir
-        self.set_language(language)
+        self.language = language
+        self.languages = tuple(dict.fromkeys([language] + list(languages or [])))
         
         # Create Jinja2 environment
         self.env = Environment(
@@ -28,18 +98,61 @@ class HockeyAnnouncer:
             trim_blocks=True,
             lstrip_blocks=True
         )
+        
+        # Compiled templates per language. The outer dict is replaced rather than
+        # mutated, so readers never need to take the lock.
+        self._templates: Dict[str, Dict[str, Template]] = {}
+        self._templates_lock = threading.Lock()
+        if preload:
+            self.preload_templates()
+    
+    def preload_templates(self) -> None:
+        """Compile the templates of all configured languages"""
+        for lang in self.languages:
+            self._load_templates(lang)
     
     def set_language(self, language: str):
-        """Change the announcement language"""
+        """
+        Change the default announcement language.
+        
+        Only affects calls that do not pass a language explicitly. Concurrent
+        callers should pass the language per call instead.
+        """
         self.language = language
     
-    def format_time(self, period: int, time_str: str) -> str:
+    def _load_templates(self, language: str) -> Dict[str, Template]:
+        """Compile all announcement templates for a language"""
+        with self._templates_lock:
+            if language in self._templates:
+                return self._templates[language]
+            
+            loaded = {}
+            for kind, fallback in self.TEMPLATE_FALLBACKS.items():
+                try:
+                    loaded[kind] = self.env.get_template(f"{kind}.{language}.j2")
+                except TemplateNotFound:
+                    # Fallback to English if template doesn't exist
+                    loaded[kind] = self.env.get_template(fallback)
+            
+            self._templates = {**self._templates, language: loaded}
+            return loaded
+    
+    def _get_template(self, kind: str, language: Optional[str] = None) -> Template:
+        """Get the compiled template of the given kind for a language"""
+        language = language or self.language
+        templates = self._templates.get(language)
+        if templates is None:
+            templates = self._load_templates(language)
+        return templates[kind]
+    
+    def format_time(self, period: int, time_str: str, language: Optional[str] = None) -> str:
         """
         Format game time as a readable string.
         
         Args:
             period: Period number
             time_str: Time string in format "MM:SS"
+            language: Language code, defaults to the announcer's default language
             
         Returns:
             Formatted time string (e.g., "5:43 in the 2nd period")
@@ -48,62 +161,31 @@ class HockeyAnnouncer:
         minutes, seconds = map(int, time_str.split(':'))
         
         # Convert time to numeric format
-        period_prefix = self._get_period_prefix(period)
+        period_prefix = self._get_period_prefix(period, language)
         
         return f"{minutes}:{seconds:02d} {period_prefix}"
     
-    def _get_period_prefix(self, period: int) -> str:
+    def _get_period_prefix(self, period: int, language: Optional[str] = None) -> str:
         """Get the period description based on language"""
-        if self.language == "sv":
-            period_names = {
-                1: "i första perioden",
-                2: "i andra perioden",
-                3: "i tredje perioden",
-                4: "i förlängningen",
-                5: "i straffläggningen"  # Shootout
-            }
-        else:  # Default to English
-            period_names = {
-                1: "in the 1st period",
-                2: "in the 2nd period",
-                3: "in the 3rd period",
-                4: "in overtime",
-                5: "in the shootout"
-            }
-        
+        period_names = self.PERIOD_NAMES.get(language or self.language, self.PERIOD_NAMES["en"])
         return period_names.get(period, f"in period {period}")
     
-    def format_strength(self, strength: str) -> str:
+    def format_strength(self, strength: str, language: Optional[str] = None) -> str:
         """
         Format the strength situation (EQ, PP, SH) as readable text.
         
         Args:
             strength: Strength code (e.g., "EQ", "PP1", "SH1")
+            language: Language code, defaults to the announcer's default language
             
         Returns:
             Human-readable strength description
         """
-        strength_map = {
-            "en": {
-                "EQ": "at even strength",
-                "PP1": "on the power play",
-                "PP2": "on a 5-on-3 power play",
-                "SH1": "shorthanded",
-                "SH2": "on a 3-on-5 penalty kill"
-            },
-            "sv": {
-                "EQ": "i lika styrka",
-                "PP1": "i numerärt överläge",
-                "PP2": "i 5 mot 3-spel",
-                "SH1": "i numerärt underläge",
-                "SH2": "i 3 mot 5-spel"
-            }
-        }
-        
-        language_map = strength_map.get(self.language, strength_map["en"])
+        language_map = self.STRENGTH_MAP.get(language or self.language, self.STRENGTH_MAP["en"])
         return language_map.get(strength, "")
     
-    def get_goal_context(self, score_state: str, team: str, game_data: Dict[str, Any]) -> str:
+    def get_goal_context(self, score_state: str, team: str, game_data: Dict[str, Any],
+                         language: Optional[str] = None) -> str:
         """
         Determine the context of a goal (takes the lead, equalizes, etc.)
         
@@ -111,6 +193,7 @@ class HockeyAnnouncer:
             score_state: Score after the goal (e.g., "2-1")
             team: Team that scored ("home" or "away")
             game_data: Full game data for context
+            language: Language code, defaults to the announcer's default language
             
         Returns:
             Context description
@@ -133,22 +216,7 @@ class HockeyAnnouncer:
         prev_team_score = team_score - 1
         
         # Determine goal context
-        context_map = {
-            "en": {
-                "takes_lead": "takes the lead",
-                "extends_lead": "extends their lead",
-                "equalizes": "ties the game",
-                "reduces_deficit": "cuts the deficit"
-            },
-            "sv": {
-                "takes_lead": "tar",
-                "extends_lead": "utökar",
-                "equalizes": "kvitterar",
-                "reduces_deficit": "reducerar"
-            }
-        }
-        
-        language_map = context_map.get(self.language, context_map["en"])
+        language_map = self.CONTEXT_MAP.get(language or self.language, self.CONTEXT_MAP["en"])
         
         if prev_team_score < opponent_score and team_score > opponent_score:
             return language_map["takes_lead"]
@@ -161,39 +229,54 @@ class HockeyAnnouncer:
         
         return language_map["takes_lead"]
     
-    def announce_event(self, event: Dict[str, Any], game_data: Dict[str, Any]) -> str:
+    def announce_event(self, event: Dict[str, Any], game_data: Dict[str, Any],
+                       language: Optional[str] = None) -> str:
         """
         Generate an announcement for a game event.
         
         Args:
             event: The event data to announce
             game_data: The full game data for context
+            language: Language code, defaults to the announcer's default language
             
         Returns:
             Formatted announcement text
         """
+        language = language or self.language
         event_type = event.get("type")
         
         if event_type == "goal":
-            return self._announce_goal(event, game_data)
+            return self._announce_goal(event, game_data, language)
         elif event_type == "penalty":
-            return self._announce_penalty(event, game_data)
+            return self._announce_penalty(event, game_data, language)
         elif event_type == "timeout":
-            return self._announce_timeout(event, game_data)
+            return self._announce_timeout(event, game_data, language)
         elif event_type == "goalie-in" or event_type == "goalie-out":
-            return self._announce_goalie_change(event, game_data)
+            return self._announce_goalie_change(event, game_data, language)
         else:
             return ""  # No announcement for other event types
     
-    def _announce_goal(self, event: Dict[str, Any], game_data: Dict[str, Any]) -> str:
-        """Generate announcement for goal events"""
-        template_name = f"goal.{self.language}.j2"
+    def announce_event_all(self, event: Dict[str, Any], game_data: Dict[str, Any],
+                           languages: Optional[List[str]] = None) -> Dict[str, str]:
+        """
+        Generate announcements for a game event in several languages at once.
         
-        try:
-            template = self.env.get_template(template_name)
-        except:
-            # Fallback to English if template doesn't exist
-            template = self.env.get_template(f"goal.en.j2")
+        Args:
+            event: The event data to announce
+            game_data: The full game data for context
+            languages: Language codes to render, defaults to all configured languages
+            
+        Returns:
+            Dictionary mapping language code to announcement text
+        """
+        return {
+            language: self.announce_event(event, game_data, language)
+            for language in (languages or self.languages)
+        }
+    
+    def _announce_goal(self, event: Dict[str, Any], game_data: Dict[str, Any], language: str) -> str:
+        """Generate announcement for goal events"""
+        template = self._get_template("goal", language)
         
         # Get team names
         team_key = event["team"]
@@ -206,16 +289,16 @@ class HockeyAnnouncer:
         assists = event.get("assists", [])
         
         # Format game time
-        game_time = self.format_time(event["period"], event["time"])
+        game_time = self.format_time(event["period"], event["time"], language)
         
         # Get the score after this goal
         score_state = event.get("scoreState", "0-0")
         
         # Get strength situation
-        strength = self.format_strength(event.get("strength", "EQ"))
+        strength = self.format_strength(event.get("strength", "EQ"), language)
         
         # Get goal context
-        goal_context = self.get_goal_context(score_state, team_key, game_data)
+        goal_context = self.get_goal_context(score_state, team_key, game_data, language)
         
         # Render the template
         return template.render(
@@ -229,15 +312,9 @@ class HockeyAnnouncer:
             goal_number=event.get("goalNumber", 1)
         )
     
-    def _announce_penalty(self, event: Dict[str, Any], game_data: Dict[str, Any]) -> str:
+    def _announce_penalty(self, event: Dict[str, Any], game_data: Dict[str, Any], language: str) -> str:
         """Generate announcement for penalty events"""
-        template_name = f"penalty.{self.language}.j2"
-        
-        try:
-            template = self.env.get_template(template_name)
-        except:
-            # Fallback to English if template doesn't exist
-            template = self.env.get_template(f"penalty.en.j2")
+        template = self._get_template("penalty", language)
         
         # Get team names
         team_key = event["team"]
@@ -247,7 +324,7 @@ class HockeyAnnouncer:
         player_name = event["player"]["name"] if "player" in event else "Bench penalty"
         
         # Format game time
-        game_time = self.format_time(event["period"], event["time"])
+        game_time = self.format_time(event["period"], event["time"], language)
         
         # Get penalty reason and duration
         reason = event.get("reason", "Unknown penalty")
@@ -262,22 +339,16 @@ class HockeyAnnouncer:
             duration=duration
         )
     
-    def _announce_timeout(self, event: Dict[str, Any], game_data: Dict[str, Any]) -> str:
+    def _announce_timeout(self, event: Dict[str, Any], game_data: Dict[str, Any], language: str) -> str:
         """Generate announcement for timeout events"""
-        template_name = f"timeout.{self.language}.j2"
-        
-        try:
-            template = self.env.get_template(template_name)
-        except:
-            # Fallback to English if template doesn't exist
-            template = self.env.get_template(f"timeout.en.j2")
+        template = self._get_template("timeout", language)
         
         # Get team names
         team_key = event["team"]
         team_name = game_data["teams"][team_key]["name"]
         
         # Format game time
-        game_time = self.format_time(event["period"], event["time"])
+        game_time = self.format_time(event["period"], event["time"], language)
         
         # Render the template
         return template.render(
@@ -285,19 +356,10 @@ class HockeyAnnouncer:
             time=game_time
         )
     
-    def _announce_goalie_change(self, event: Dict[str, Any], game_data: Dict[str, Any]) -> str:
+    def _announce_goalie_change(self, event: Dict[str, Any], game_data: Dict[str, Any], language: str) -> str:
         """Generate announcement for goalie change events"""
-        if event["type"] == "goalie-in":
-            template_name = f"goalie_in.{self.language}.j2"
-        else:
-            template_name = f"goalie_out.{self.language}.j2"
-        
-        try:
-            template = self.env.get_template(template_name)
-        except:
-            # Fallback to English if template doesn't exist
-            fallback = "goalie_in.en.j2" if event["type"] == "goalie-in" else "goalie_out.en.j2"
-            template = self.env.get_template(fallback)
+        kind = "goalie_in" if event["type"] == "goalie-in" else "goalie_out"
+        template = self._get_template(kind, language)
         
         # Get team names
         team_key = event["team"]
@@ -307,7 +369,7 @@ class HockeyAnnouncer:
         goalie_name = event["player"]["name"] if "player" in event else "Unknown Goalie"
         
         # Format game time
-        game_time = self.format_time(event["period"], event["time"])
+        game_time = self.format_time(event["period"], event["time"], language)
         
         # Render the template
         return template.render(
@@ -315,30 +377,18 @@ class HockeyAnnouncer:
             goalie=goalie_name,
             time=game_time
         )
-    def announce_welcome(self, game_data: Dict[str, Any]) -> str:
+    def announce_welcome(self, game_data: Dict[str, Any], language: Optional[str] = None) -> str:
         """Generate announcement for timeout events"""
-        template_name = f"welcome.{self.language}.j2"
-        
-        try:
-            template = self.env.get_template(template_name)
-        except:
-            # Fallback to English if template doesn't exist
-            template = self.env.get_template(f"timeout.en.j2")
+        template = self._get_template("welcome", language)
         
         # Render the template
         return template.render(
             game=game_data
         )
     
-    def announce_lineups(self, game_data: Dict[str, Any]) -> str:
+    def announce_lineups(self, game_data: Dict[str, Any], language: Optional[str] = None) -> str:
         """Generate announcement for timeout events"""
-        template_name = f"lineups.{self.language}.j2"
-        
-        try:
-            template = self.env.get_template(template_name)
-        except:
-            # Fallback to English if template doesn't exist
-            template = self.env.get_template(f"timeout.en.j2")
+        template = self._get_template("lineups", language)
         
         # Render the template
         return template.render(
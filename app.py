@@ -1,30 +1,214 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_file
-from swehockey import SwehockeyAPI
+import time
+_import_started = time.perf_counter()
+
+from flask import Flask, Response, g, render_template, request, redirect, session, url_for, flash, jsonify, send_file
+from werkzeug.local import LocalProxy
+from registry import GameRegistry
+from broadcast import EventBroadcaster
+from fragments import FragmentCache, hit_rates
+from poller import GamePoller, RequestBudget
+from responses import EncodedBodyCache, choose_encoding, encode_json
 from announcer import HockeyAnnouncer  # Adjust as needed
-from elevenlabs.client import ElevenLabs
+from swehockey import LazyGame, SwehockeyAPI
+from season_archive import SeasonArchive
+from state_snapshot import StateSnapshotter
+from store import SharedStore
+from timeline import GameTimeline, parse_clock
+from tts_cache import AudioCache
+from tts import Presynthesizer, SegmentSynthesizer, make_backend, prepare_text
+from metrics import metrics
+import atexit
+import functools
 import json
 import os
+import threading
+import weakref
 from datetime import datetime
 import jinja2
-from io import BytesIO
 
 app = Flask(__name__)
-app.secret_key = os.urandom(24)
+# Per-process fallback; create_app() shares one key between all workers
+app.secret_key = os.getenv('SECRET_KEY') or os.urandom(24)
+
+# Clients and caches are created on first use, once per process, so workers
+# forked by gunicorn never share threads or connections with their parent
+_services = {}
+_services_pid = None
+_services_lock = threading.RLock()
+_service_factories = {}
+
+def get_service(name):
+    """Get this process's instance of a service, creating it on first use"""
+    global _services_pid
+    with _services_lock:
+        if _services_pid != os.getpid():
+            _services.clear()
+            _services_pid = os.getpid()
+        if name not in _services:
+            started = time.perf_counter()
+            _services[name] = _service_factories[name]()
+            metrics.set(f'startup.init.{name}_seconds', time.perf_counter() - started)
+        return _services[name]
+
+def service(factory):
+    """Register a lazily created service; the module-level name becomes a proxy to it"""
+    _service_factories[factory.__name__] = factory
+    return LocalProxy(functools.partial(get_service, factory.__name__))
+
+@service
+def store():
+    return SharedStore(os.getenv('SWEHOCKEY_STORE', os.path.join(app.instance_path, 'shared.sqlite3')))
+
+@service
+def season_archive():
+    """
+    Archive recording the raw API responses, optional; SEASON_ARCHIVE is the path of the archive file.
+    A new archive trains its compression dictionary from the first SEASON_ARCHIVE_TRAIN_AFTER
+    payloads; those stay compressed without one, so create the archive with
+    `python season_archive.py` on sample games for the best ratio.
+    """
+    path = os.getenv('SEASON_ARCHIVE')
+    if not path:
+        return None
+    return SeasonArchive(path, train_after=int(os.getenv('SEASON_ARCHIVE_TRAIN_AFTER', 300)))
+
+@service
+def registry():
+    coalesce_window = float(os.getenv('SWEHOCKEY_COALESCE_WINDOW', 1.0))
+    game_registry = GameRegistry(lambda: SwehockeyAPI(coalesce_window=coalesce_window, shared_cache=get_service('store'),
+                                                      recorder=get_service('season_archive')),
+                                 max_games=int(os.getenv('REGISTRY_MAX_GAMES', 256)),
+                                 idle_timeout=float(os.getenv('REGISTRY_IDLE_TIMEOUT', 6 * 3600)))
+    game_registry.add_listener(presynthesize_new_events)
+    game_registry.add_listener(publish_event_changes)
+    return game_registry
+
+@service
+def announcer():
+    return HockeyAnnouncer(language="sv", languages=["sv", "en"], preload=False)
+
+@service
+def tts_backend():
+    return make_backend()  # Set TTS_BACKEND=stub to run without ElevenLabs
+
+@service
+def audio_cache():
+    return AudioCache(
+        cache_dir=os.getenv('TTS_CACHE_DIR', 'tts_cache'),
+        max_bytes=int(os.getenv('TTS_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+    )
+
+@service
+def presynthesizer():
+    return Presynthesizer(
+        get_service('tts_backend'),
+        get_service('audio_cache'),
+        workers=int(os.getenv('PRESYNTH_WORKERS', 2))
+    )
+
+@service
+def segment_synthesizer():
+    return SegmentSynthesizer(
+        get_service('tts_backend'),
+        get_service('audio_cache'),
+        workers=int(os.getenv('TTS_SEGMENT_WORKERS', 4))
+    )
+
+@service
+def broadcaster():
+    return EventBroadcaster()
+
+@service
+def poller():
+    # The budget is kept in the shared store, so it limits all workers together
+    budget = RequestBudget(float(os.getenv('POLL_BUDGET_PER_MINUTE', 60)), store=get_service('store'))
+    game_poller = GamePoller(get_service('registry'), budget, store=get_service('store'))
+    if os.getenv('POLLER_ENABLED', '1') != '0':
+        game_poller.start()
+    return game_poller
+
+@service
+def snapshotter():
+    return StateSnapshotter(
+        get_service('registry'),
+        os.getenv('STATE_SNAPSHOT', os.path.join(app.instance_path, 'state.json')),
+        interval=float(os.getenv('STATE_SNAPSHOT_INTERVAL', 10)),
+        max_age=float(os.getenv('STATE_SNAPSHOT_MAX_AGE', 6 * 3600))
+    )
+
+@service
+def body_cache():
+    return EncodedBodyCache()
+
+@service
+def fragment_cache():
+    return FragmentCache(int(os.getenv('FRAGMENT_CACHE_SIZE', 4096)))
+
+# Sections of the converted game served as sub-resources of /api/games/<id>
+API_SECTIONS = ('game', 'teams', 'personnel', 'roster', 'statistics', 'events')
+# Longest long-poll of /api/games/<id>/events?since=<cursor>&wait=<seconds>
+MAX_EVENTS_WAIT = float(os.environ.get('EVENTS_MAX_WAIT', 25))
+
+def request_language():
+    """Announcement language for the current request, e.g. ?lang=en"""
+    language = request.args.get('lang')
+    if language in announcer.languages:
+        return language
+    return announcer.language
+
+@app.url_value_preprocessor
+def pull_game_id(endpoint, values):
+    g.game_id = values.get('game_id') if values else None
+
+@app.url_defaults
+def add_game_id(endpoint, values):
+    # Lets templates link to url_for('summary') within the game being viewed
+    if 'game_id' in values or not g.get('game_id'):
+        return
+    if app.url_map.is_endpoint_expecting(endpoint, 'game_id'):
+        values['game_id'] = g.game_id
+
+# Games seen by any worker are warmed up by workers started later
+HOT_GAME_TTL = 6 * 3600
+_hot_game_marks = {}
+
+def watch_game(game_id):
+    """Poll a loaded game and remember it as hot in the shared store"""
+    poller.watch(game_id)
+    now = time.monotonic()
+    if now - _hot_game_marks.get(game_id, -HOT_GAME_TTL) > 60:
+        _hot_game_marks[game_id] = now
+        store.set(f'hot_game:{game_id}', game_id, ttl=HOT_GAME_TTL)
+
+def flash_if_stale(entry):
+    """Warn the operator when the game could not be refreshed and older data is shown"""
+    stale = entry.data.get('stale')
+    if stale:
+        flash(f"Swehockey is not responding, showing data from {stale['age']:.0f} seconds ago ({stale['error']})", 'warning')
+        return True
+    return False
 
-# Global variables
-current_game = None
-api = SwehockeyAPI()
-announcer = HockeyAnnouncer(language="sv")
-tts_client = ElevenLabs(api_key=os.getenv('ELEVENLABS_API_KEY'))  # Ensure API key is set in environment
+def game_view(view):
+    """Load the game from the URL (on first use) and make it the session's selected game"""
+    @functools.wraps(view)
+    def wrapper(game_id, **kwargs):
+        try:
+            entry = registry.load(game_id)
+        except Exception as e:
+            flash(f'Error loading game: {str(e)}', 'danger')
+            return redirect(url_for('index'))
+        session['game_id'] = game_id
+        watch_game(game_id)
+        flash_if_stale(entry)
+        return view(entry, **kwargs)
+    return wrapper
 
 @app.route('/')
 def index():
-    return render_template('index.html')
+    return render_template('index.html', games=registry.games())
 
 @app.route('/load_game', methods=['POST'])
 def load_game():
-    global current_game, api
-    
     game_id = request.form.get('game_id')
     if not game_id:
         flash('Please enter a game ID', 'danger')
@@ -32,8 +216,10 @@ def load_game():
     
     try:
         game_id = int(game_id)
-        current_game = api.load_game(game_id)
-        return redirect(url_for('summary'))
+        registry.load(game_id)
+        session['game_id'] = game_id
+        watch_game(game_id)
+        return redirect(url_for('summary', game_id=game_id))
     except ValueError:
         flash('Game ID must be a number', 'danger')
         return redirect(url_for('index'))
@@ -41,62 +227,144 @@ def load_game():
         flash(f'Error loading game: {str(e)}', 'danger')
         return redirect(url_for('index'))
 
-@app.route('/summary')
-def summary():
-    if current_game is None:
+@app.route('/summary', endpoint='selected_summary')
+@app.route('/lineups', endpoint='selected_lineups')
+@app.route('/actions', endpoint='selected_actions')
+def selected_game():
+    """Redirect the old single-game URLs to the game selected in this session"""
+    game_id = session.get('game_id')
+    if game_id is None or registry.get(game_id) is None:
         flash('No game loaded', 'warning')
         return redirect(url_for('index'))
-    return render_template('summary.html', game=current_game)
+    page = request.endpoint.split('_', 1)[1]
+    return redirect(url_for(page, game_id=game_id))
 
-@app.route('/lineups')
-def lineups():
-    if current_game is None:
-        flash('No game loaded', 'warning')
-        return redirect(url_for('index'))
-    lineups_announce = announcer.announce_lineups(current_game)
-    welcome_announce = announcer.announce_welcome(current_game)
-    return render_template('lineups.html', game=current_game, lineups_announce=lineups_announce, welcome_announce=welcome_announce)
-
-@app.route('/actions')
-def actions():
-    global announcer
-    if current_game is None:
-        flash('No game loaded', 'warning')
-        return redirect(url_for('index'))
+@app.route('/game/<int:game_id>/summary')
+@game_view
+def summary(entry):
+    return render_template('summary.html', game=entry.data)
+
+@app.route('/game/<int:game_id>/lineups')
+@game_view
+def lineups(entry):
+    game = entry.data
+    language = request_language()
+    lineups_announce = announcer.announce_lineups(game, language)
+    welcome_announce = announcer.announce_welcome(game, language)
+    return render_template('lineups.html', game=game, lineups_announce=lineups_announce, welcome_announce=welcome_announce)
+
+@app.route('/game/<int:game_id>/actions')
+@game_view
+def actions(entry):
+    game = entry.data
     
-    for event in current_game['events']:
-        event['announcement'] = announcer.announce_event(event, current_game)
+    # Announcements are kept out of the shared game data so concurrent
+    # requests in different languages do not overwrite each other
+    language = request_language()
+    announcements = {
+        event['id']: announcer.announce_event(event, game, language)
+        for event in game['events']
+    }
     
-    return render_template('actions.html', game=current_game)
+    return render_template('actions.html', game=game, announcements=announcements)
 
-@app.route('/refresh/<refresh_type>')
-def refresh(refresh_type):
-    global current_game, api
+def presynthesize_new_events(entry, changes):
+    """Queue announcement audio for events that appeared since the last refresh"""
+    for op, event in changes:
+        if op != 'added' or event['type'] not in Presynthesizer.PRIORITIES:
+            continue
+        text = announcer.announce_event(event, entry.data)
+        if text:
+            presynthesizer.submit(text, event['type'])
+
+def render_event_card(game, event, announcement):
+    """Event card HTML, shared with the actions page through the fragment cache"""
+    key = FragmentCache.key('event-card', game, ('teams',), event, announcement)
+    return fragment_cache.get(key, lambda: render_template('includes/event_card.html', game=game, event=event,
+                                                           announcement=announcement))
+
+def publish_event_changes(entry, changes):
+    """Push new, changed and removed events to the game's live viewers"""
+    if not broadcaster.subscriber_count(entry.game_id):
+        return
     
-    if current_game is None:
+    game = entry.data
+    with app.app_context():
+        for op, event in changes:
+            message = {'op': op, 'event': event}
+            if op != 'removed':
+                # Rendered once per language, shared by every viewer
+                message['announcements'] = announcer.announce_event_all(event, game)
+                message['html'] = {
+                    language: render_event_card(game, event, text)
+                    for language, text in message['announcements'].items()
+                }
+            broadcaster.publish(entry.game_id, message)
+
+
+@app.route('/game/<int:game_id>/stream')
+def event_stream(game_id):
+    """Server-Sent Events stream of event changes for a game"""
+    language = request_language()
+    subscription = broadcaster.subscribe(game_id)
+    
+    def generate():
+        try:
+            yield 'retry: 3000\n\n'
+            while not subscription.closed:
+                message = subscription.get(timeout=15)
+                if message is None:
+                    yield ': keepalive\n\n'
+                    continue
+                payload = {'event': message['event']}
+                if 'html' in message:
+                    payload['announcement'] = message['announcements'][language]
+                    payload['html'] = message['html'][language]
+                yield f"event: {message['op']}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+        finally:
+            broadcaster.unsubscribe(subscription)
+    
+    return Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/refresh/<refresh_type>')
+def refresh_selected(refresh_type):
+    """Refresh the game selected in this session"""
+    game_id = session.get('game_id')
+    if game_id is None or registry.get(game_id) is None:
+        flash('No game loaded', 'warning')
+        return redirect(url_for('index'))
+    return redirect(url_for('refresh', game_id=game_id, refresh_type=refresh_type))
+
+@app.route('/game/<int:game_id>/refresh/<refresh_type>')
+def refresh(game_id, refresh_type):
+    if registry.get(game_id) is None:
         flash('No game loaded', 'warning')
         return redirect(url_for('index'))
     
     try:
         if refresh_type == 'summary':
-            current_game = api.refresh_summary()
-            flash('Summary data refreshed', 'success')
+            entry = registry.refresh(game_id, 'summary')
+            if not entry.data.get('stale'):  # The page shows the stale warning
+                flash('Summary data refreshed', 'success')
             return redirect(url_for('summary'))
         elif refresh_type == 'lineups':
-            current_game = api.refresh_lineups()
-            flash('Lineup data refreshed', 'success')
+            entry = registry.refresh(game_id, 'lineups')
+            if not entry.data.get('stale'):  # The page shows the stale warning
+                flash('Lineup data refreshed', 'success')
             return redirect(url_for('lineups'))
         elif refresh_type == 'actions':
-            current_game = api.refresh_actions()
-            for event in current_game['events']:
-                event['announcement'] = announcer.announce_event(event, current_game)
-            flash('Actions data refreshed', 'success')
+            entry = registry.refresh(game_id, 'actions')
+            if not entry.data.get('stale'):  # The page shows the stale warning
+                flash('Actions data refreshed', 'success')
             return redirect(url_for('actions'))
         elif refresh_type == 'all':
-            current_game = api.refresh_all()
-            for event in current_game['events']:
-                event['announcement'] = announcer.announce_event(event, current_game)
-            flash('All game data refreshed', 'success')
+            entry = registry.refresh(game_id, 'all')
+            if not entry.data.get('stale'):  # The page shows the stale warning
+                flash('All game data refreshed', 'success')
             return redirect(url_for('summary'))
         else:
             flash('Invalid refresh type', 'danger')
@@ -105,37 +373,264 @@ def refresh(refresh_type):
         flash(f'Error refreshing data: {str(e)}', 'danger')
         return redirect(url_for('summary'))
 
-@app.route('/tts', methods=['POST'])
+@app.route('/tts', methods=['GET', 'POST'])
 def text_to_speech():
-    global tts_client
-    text = request.form.get('text')
+    text = request.values.get('text')
     if not text:
         return jsonify({'error': 'No text provided'}), 400
     
     try:
-        # Get the audio generator from ElevenLabs
-        text = text.replace("Haninge Anchors HC Röd", "Haninge")
-        text = text.replace("IFK Österåker Hockey", "Österåker")
-        audio_generator = tts_client.text_to_speech.convert(
-            text=text,
-            voice_id="FF7KdobWPaiR0vkcALHF",  # Swedish voice ID
-            model_id="eleven_multilingual_v2",
-            output_format="mp3_44100_128",
-        )
+        text = prepare_text(text)
+        
+        # Long announcements (?mode=segments) are assembled from cached segments
+        segments = request.values.get('mode') == 'segments'
         
-        # Collect all chunks from the generator into a single bytes object
-        audio_bytes = b''.join(audio_generator)
+        # Identical announcements are only synthesized once, per synthesis mode
+        synthesizer = segment_synthesizer if segments else tts_backend
+        key = synthesizer.cache_key(audio_cache, text)
+        path = audio_cache.get(key)
+        if path is not None:
+            # Cached files support Range and If-None-Match requests
+            return send_file(
+                path,
+                mimetype='audio/mpeg',
+                as_attachment=False,
+                download_name='announcement.mp3',
+                conditional=True,
+                etag=key
+            )
         
-        # Return the audio as a file response
-        return send_file(
-            BytesIO(audio_bytes),
-            mimetype='audio/mp3',
-            as_attachment=False,
-            download_name='announcement.mp3'
+        if segments:
+            audio_generator = segment_synthesizer.stream(text)
+        else:
+            audio_generator = tts_backend.synthesize(text)
+        
+        # Wait for the first chunk here so synthesis errors still become a 500
+        first_chunk = next((chunk for chunk in audio_generator if chunk), b'')
+        if not first_chunk:
+            # Nothing to stream, and an empty clip must not be cached
+            return jsonify({'error': 'Speech synthesis returned no audio'}), 502
+        
+        response = Response(
+            stream_to_cache(key, first_chunk, audio_generator),
+            mimetype='audio/mpeg',
+            headers={'Cache-Control': 'no-cache'},
+            direct_passthrough=True
         )
+        # Also when the body is never sent (HEAD, early disconnect), stop the synthesis
+        if hasattr(audio_generator, 'close'):
+            response.call_on_close(audio_generator.close)
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def stream_to_cache(key, first_chunk, chunks):
+    """
+    Yield audio chunks to the client while writing them to the audio cache.
+    The cache writer is only opened once the body is sent, and always closed.
+    """
+    writer = None
+    committed = False
+    try:
+        writer = audio_cache.writer(key)
+        writer.write(first_chunk)
+        yield first_chunk
+        for chunk in chunks:
+            writer.write(chunk)
+            yield chunk
+        if writer.size:
+            writer.commit()
+            committed = True
+    finally:
+        # Client went away or synthesis failed, do not cache a truncated clip
+        if writer is not None and not committed:
+            writer.abort()
+
+def snapshot_response(entry, version, section, payload):
+    """
+    JSON response for a game snapshot with a strong ETag, 304 support and compression.
+    The ETag changes only when the snapshot version does, so unchanged polls cost a 304.
+    Versions count from the start of each client, so the ETag also carries the client's
+    epoch and never names different content in another worker or after a restart.
+    """
+    epoch = entry.api.epoch
+    encoding = choose_encoding(request.accept_encodings)
+    etag = f"{epoch}-{entry.game_id}-{version}-{section}" + (f"-{encoding}" if encoding else "")
+    
+    if request.if_none_match.contains(etag):
+        metrics.incr('api.not_modified')
+        response = Response(status=304)
+    else:
+        body = body_cache.get((epoch, entry.game_id, version, section, encoding),
+                              lambda: encode_json(payload, encoding))
+        response = Response(body, mimetype='application/json')
+        if encoding:
+            response.content_encoding = encoding
+    
+    response.set_etag(etag)
+    # Base version for /api/games/<id>/patch?since=<version>, opaque like the ETag
+    response.headers['X-Snapshot-Version'] = entry.api.version_token(version)
+    response.vary.add('Accept-Encoding')
+    response.cache_control.no_cache = True
+    return response
+
+@app.route('/api/games/<int:game_id>')
+@app.route('/api/games/<int:game_id>/<section>')
+def api_game(game_id, section=None):
+    if section is not None and section not in API_SECTIONS:
+        return jsonify({'error': f'Unknown section: {section}'}), 404
+    
+    try:
+        entry = registry.load(game_id)
+    except Exception as e:
+        return jsonify({'error': f'Error loading game: {str(e)}'}), 502
+    watch_game(game_id)
+    
+    version, game = entry.snapshot()
+    if section is None:
+        # The fetch timestamp moves without a new version, and data turns stale (and fresh
+        # again) without one, so both are left out of the versioned document; staleness is
+        # signalled by the Warning and Age headers only
+        payload = {key: value for key, value in game.items() if key not in ('timestamp', 'stale')}
+    else:
+        payload = game[section]
+    response = snapshot_response(entry, version, section or 'all', payload)
+    if game.get('stale'):
+        response.headers['Warning'] = '110 - "Response is Stale"'
+        response.headers['Age'] = str(int(game['stale']['age']))
+    return response
+
+# Timeline of each loaded game's latest snapshot, rebuilt when the version changes;
+# dropped with the game's registry entry, so it is bounded like the registry
+_timelines = weakref.WeakKeyDictionary()
+
+def game_timeline(entry):
+    """Get the timeline of a loaded game's current snapshot"""
+    version, game = entry.snapshot()
+    cached = _timelines.get(entry)
+    if cached is None or cached[0] != version:
+        cached = (version, GameTimeline.from_game(game))
+        _timelines[entry] = cached
+    return cached[1]
+
+@app.route('/api/games/<int:game_id>/timeline')
+def api_timeline(game_id):
+    """
+    Penalty and goalie-pulled intervals, strength segments and time in each strength.
+    With ?at=MM:SS, only the strength at that game time.
+    """
+    try:
+        entry = registry.load(game_id)
+    except Exception as e:
+        return jsonify({'error': f'Error loading game: {str(e)}'}), 502
+    watch_game(game_id)
+    timeline = game_timeline(entry)
+
+    at = request.args.get('at')
+    if at is not None:
+        try:
+            seconds = parse_clock(at)
+        except ValueError:
+            return jsonify({'error': f'Invalid game time: {at}'}), 400
+        state = timeline.state_at(seconds)
+        return jsonify({
+            'time': at,
+            'strength': timeline.strength_at(seconds),
+            'homeGoalie': state['home'][1],
+            'awayGoalie': state['away'][1]
+        })
+
+    return snapshot_response(entry, entry.version, 'timeline', {
+        'cumulativeClock': timeline.cumulative,
+        'end': timeline.end,
+        'segments': timeline.segments(),
+        'timeInStrength': timeline.time_in_strength(),
+        'penalties': timeline.penalty_intervals,
+        'goaliePulled': timeline.goalie_pulled_intervals,
+        'strengthMismatches': timeline.validate_goal_strengths()
+    })
+
+@app.route('/api/games/<int:game_id>/events')
+def api_events(game_id):
+    """
+    Event changes after ?since=<cursor>, optionally waiting up to ?wait=<seconds> for one.
+    Without since, the full event list is returned like the other sections.
+    The cursor is opaque; one from another worker or from before a restart gets a reset.
+    """
+    since = request.args.get('since')
+    if since is None:
+        return api_game(game_id, 'events')
+    wait = min(max(request.args.get('wait', 0, type=float), 0), MAX_EVENTS_WAIT)
+
+    try:
+        entry = registry.load(game_id)
+    except Exception as e:
+        return jsonify({'error': f'Error loading game: {str(e)}'}), 502
+    watch_game(game_id)
+
+    delta = entry.api.events_since(since)
+    if not delta['changes'] and wait:
+        metrics.incr('api.events.long_polls')
+        if entry.api.wait_for_events(since, wait):
+            delta = entry.api.events_since(since)
+    metrics.incr('api.events.changes', len(delta['changes']))
+
+    encoding = choose_encoding(request.accept_encodings)
+    response = Response(encode_json(delta, encoding), mimetype='application/json')
+    if encoding:
+        response.content_encoding = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.no_store = True
+    return response
+
+@app.route('/api/games/<int:game_id>/patch')
+def api_patch(game_id):
+    """
+    JSON Patch (RFC 6902) from the converted data at version ?since=<version> to the
+    current version. With reset, the client must fetch /api/games/<id> instead.
+    The version is the X-Snapshot-Version header of that response.
+    """
+    since = request.args.get('since')
+    if not since:
+        return jsonify({'error': 'Missing since parameter'}), 400
+
+    try:
+        entry = registry.load(game_id)
+    except Exception as e:
+        return jsonify({'error': f'Error loading game: {str(e)}'}), 502
+    watch_game(game_id)
+
+    delta = entry.api.patches_since(since)
+    metrics.incr('api.patch.operations', len(delta['patch']))
+
+    encoding = choose_encoding(request.accept_encodings)
+    response = Response(encode_json(delta, encoding), mimetype='application/json')
+    if encoding:
+        response.content_encoding = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.no_store = True
+    return response
+
+@app.route('/metrics')
+def show_metrics():
+    values = metrics.snapshot()
+    # Sections converted by the lazily converted games, e.g. to check that
+    # viewing lineups does not convert the statistics
+    for section, count in LazyGame.counters().items():
+        values[f'convert.sections.{section}'] = count
+    values.update(hit_rates(values))
+    return jsonify(values)
+
+# Template globals
+@app.template_global()
+@jinja2.pass_context
+def cached_fragment(context, name, sections=(), data=None, extra=None, caller=None):
+    """
+    Render the body of a {% call cached_fragment(...) %} block once per version of
+    the game sections it shows (see FragmentCache.key) and reuse it afterwards.
+    """
+    return fragment_cache.get(FragmentCache.key(name, context.get('game'), sections, data, extra), caller)
+
 # Template filters remain unchanged
 @app.template_filter('format_time')
 def format_time(time_str):
@@ -173,5 +668,87 @@ def event_color(event_type):
 def team_class(team_side):
     return 'home-team' if team_side == 'home' else 'away-team'
 
+# Page templates compiled by warm_up()
+WARM_TEMPLATES = ('index.html', 'summary.html', 'lineups.html', 'actions.html', 'includes/event_card.html',
+                  'includes/game_header.html')
+
+def warm_up(game_ids=None):
+    """
+    Prepare this process before it serves requests: compile the page and
+    announcement templates and load hot games (SWEHOCKEY_WARM_GAMES, plus the
+    games other workers recently served).
+    """
+    started = time.perf_counter()
+    announcer.preload_templates()
+    for name in WARM_TEMPLATES:
+        app.jinja_env.get_template(name)
+
+    if game_ids is None:
+        game_ids = [int(game_id) for game_id in os.getenv('SWEHOCKEY_WARM_GAMES', '').split(',') if game_id.strip()]
+        game_ids += [game_id for _, game_id in store.items('hot_game:')]
+    for game_id in dict.fromkeys(game_ids):
+        try:
+            registry.load(game_id)
+            watch_game(game_id)
+            metrics.incr('startup.warm_games')
+        except Exception:
+            metrics.incr('startup.warm_errors')
+
+    metrics.set('startup.warm_up_seconds', time.perf_counter() - started)
+
+_first_request_seen = False
+
+@app.before_request
+def record_cold_start():
+    global _first_request_seen
+    if not _first_request_seen:
+        _first_request_seen = True
+        metrics.set('startup.first_request_seconds', time.perf_counter() - _import_started)
+
+def restore_state():
+    """
+    Restore the games saved by an earlier process (see StateSnapshotter), resume
+    polling them and keep saving them periodically and at exit.
+    """
+    for game_id in snapshotter.restore():
+        watch_game(game_id)
+    snapshotter.start()
+    atexit.register(snapshotter.stop)
+
+# Process in which create_app() configured the app
+_configured_pid = None
+_configure_lock = threading.Lock()
+
+def create_app(warm=None):
+    """
+    Configure the application for this process and return it.
+
+    Use as the WSGI entry point, e.g. gunicorn "app:create_app()". Clients are
+    created lazily per process. The session secret comes from SECRET_KEY or is
+    shared by all workers through the local store. Games saved by an earlier
+    process are restored unless STATE_SNAPSHOT_ENABLED=0. Set SWEHOCKEY_WARM=1
+    (or pass warm=True) to run warm_up() before serving.
+
+    The app is configured once per process; later calls in the same process
+    return it unchanged, without restoring or warming up again.
+    """
+    global _configured_pid
+    with _configure_lock:
+        if _configured_pid == os.getpid():
+            return app
+        started = time.perf_counter()
+        app.secret_key = os.getenv('SECRET_KEY') or store.get_or_create('secret_key', lambda: os.urandom(24).hex())
+        if os.getenv('STATE_SNAPSHOT_ENABLED', '1') != '0':
+            restore_state()
+        if warm is None:
+            warm = os.getenv('SWEHOCKEY_WARM', '0') == '1'
+        if warm:
+            warm_up()
+        _configured_pid = os.getpid()
+        metrics.set('startup.create_app_seconds', time.perf_counter() - started)
+        return app
+
+metrics.set('startup.import_seconds', time.perf_counter() - _import_started)
+
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    create_app().run(debug=True)
\ No newline at end of file
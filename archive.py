@@ -0,0 +1,379 @@
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from timeline import GameTimeline
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS teams (
+    id INTEGER PRIMARY KEY,
+    club_id INTEGER,
+    name TEXT NOT NULL,
+    short_name TEXT,
+    full_name TEXT,
+    color TEXT
+);
+
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    date TEXT,
+    tournament TEXT,
+    tournament_short TEXT,
+    venue TEXT,
+    attendance TEXT,
+    home_team_id INTEGER NOT NULL REFERENCES teams (id),
+    away_team_id INTEGER NOT NULL REFERENCES teams (id),
+    home_goals INTEGER,
+    away_goals INTEGER,
+    period_results TEXT,
+    is_ended INTEGER,
+    is_official INTEGER,
+    archived_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS games_date ON games (date);
+CREATE INDEX IF NOT EXISTS games_home_team ON games (home_team_id, away_team_id);
+CREATE INDEX IF NOT EXISTS games_away_team ON games (away_team_id, home_team_id);
+
+CREATE TABLE IF NOT EXISTS players (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    position TEXT
+);
+
+CREATE TABLE IF NOT EXISTS game_players (
+    game_id INTEGER NOT NULL REFERENCES games (id) ON DELETE CASCADE,
+    player_id INTEGER NOT NULL REFERENCES players (id),
+    team_id INTEGER NOT NULL REFERENCES teams (id),
+    side TEXT NOT NULL,
+    jersey_no INTEGER,
+    line INTEGER,
+    starter INTEGER,
+    is_goalie INTEGER NOT NULL,
+    PRIMARY KEY (game_id, player_id)
+);
+CREATE INDEX IF NOT EXISTS game_players_player ON game_players (player_id);
+
+CREATE TABLE IF NOT EXISTS events (
+    game_id INTEGER NOT NULL REFERENCES games (id) ON DELETE CASCADE,
+    event_id INTEGER NOT NULL,
+    period INTEGER NOT NULL,
+    time TEXT NOT NULL,
+    game_seconds INTEGER NOT NULL,
+    team_id INTEGER REFERENCES teams (id),
+    side TEXT,
+    type TEXT NOT NULL,
+    player_id INTEGER REFERENCES players (id),
+    player_name TEXT,
+    jersey_no INTEGER,
+    duration INTEGER,
+    reason TEXT,
+    strength TEXT,
+    score_state TEXT,
+    is_highlighted INTEGER,
+    PRIMARY KEY (game_id, event_id)
+);
+CREATE INDEX IF NOT EXISTS events_player ON events (player_id, type);
+CREATE INDEX IF NOT EXISTS events_team ON events (team_id, type);
+CREATE INDEX IF NOT EXISTS events_type ON events (type, reason);
+
+CREATE TABLE IF NOT EXISTS assists (
+    game_id INTEGER NOT NULL REFERENCES games (id) ON DELETE CASCADE,
+    event_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    player_id INTEGER REFERENCES players (id),
+    player_name TEXT,
+    jersey_no INTEGER,
+    PRIMARY KEY (game_id, event_id, position)
+);
+CREATE INDEX IF NOT EXISTS assists_player ON assists (player_id);
+
+CREATE TABLE IF NOT EXISTS period_stats (
+    game_id INTEGER NOT NULL REFERENCES games (id) ON DELETE CASCADE,
+    period INTEGER NOT NULL,
+    side TEXT NOT NULL,
+    team_id INTEGER NOT NULL REFERENCES teams (id),
+    stat TEXT NOT NULL,
+    value REAL,
+    text_value TEXT,
+    PRIMARY KEY (game_id, period, side, stat)
+);
+CREATE INDEX IF NOT EXISTS period_stats_team ON period_stats (team_id, stat);
+"""
+
+# Tables holding the rows of one game, deleted before the game is archived again
+GAME_TABLES = ("game_players", "events", "assists", "period_stats", "games")
+
+
+class GameArchive:
+    """
+    SQLite archive of converted games.
+
+    Games are normalized into teams, games, players, per-game rosters, events,
+    assists and period statistics (period 0 holds the game totals), with
+    indexes for lookups by game, player, team, event type and date.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open the archive, creating the database and its tables if needed.
+
+        Args:
+            path: Path of the SQLite database file
+        """
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        """Close the database connection"""
+        self._conn.close()
+
+    def add_game(self, game: Mapping[str, Any]) -> None:
+        """
+        Archive one converted game, replacing an earlier copy of it.
+
+        Args:
+            game: Converted game data as returned by SwehockeyAPI.load_game()
+        """
+        self.add_games([game])
+
+    def add_games(self, games: Iterable[Mapping[str, Any]]) -> int:
+        """
+        Archive many converted games in a single transaction.
+        Either all games are stored or, on an error, none.
+
+        Args:
+            games: Converted game data as returned by SwehockeyAPI.load_game()
+
+        Returns:
+            int: Number of games archived
+        """
+        rows: Dict[str, List[tuple]] = {
+            "teams": [], "games": [], "players": [], "game_players": [],
+            "events": [], "assists": [], "period_stats": []
+        }
+        game_ids = []
+        for game in games:
+            game_ids.append(game["game"]["id"])
+            self._collect_rows(game, rows)
+
+        with self._lock, self._conn:
+            for table in GAME_TABLES:
+                self._conn.executemany(f"DELETE FROM {table} WHERE {'id' if table == 'games' else 'game_id'} = ?",
+                                       [(game_id,) for game_id in game_ids])
+            self._conn.executemany(
+                "INSERT INTO teams VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (id) DO UPDATE SET club_id = excluded.club_id,"
+                " name = excluded.name, short_name = excluded.short_name, full_name = excluded.full_name,"
+                " color = excluded.color",
+                rows["teams"]
+            )
+            self._conn.executemany("INSERT INTO games VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows["games"])
+            self._conn.executemany(
+                "INSERT INTO players VALUES (?, ?, ?) ON CONFLICT (id) DO UPDATE SET name = excluded.name,"
+                " position = excluded.position",
+                rows["players"]
+            )
+            self._conn.executemany("INSERT OR IGNORE INTO game_players VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows["game_players"])
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows["events"]
+            )
+            self._conn.executemany("INSERT OR REPLACE INTO assists VALUES (?, ?, ?, ?, ?, ?)", rows["assists"])
+            self._conn.executemany("INSERT OR REPLACE INTO period_stats VALUES (?, ?, ?, ?, ?, ?, ?)", rows["period_stats"])
+        return len(game_ids)
+
+    def _collect_rows(self, game: Mapping[str, Any], rows: Dict[str, List[tuple]]) -> None:
+        """Flatten one converted game into table rows"""
+        info = game["game"]
+        game_id = info["id"]
+        teams = game["teams"]
+        team_ids = {side: teams[side]["id"] for side in ("home", "away")}
+
+        for side in ("home", "away"):
+            team = teams[side]
+            rows["teams"].append((team["id"], team.get("clubId"), team["name"], team.get("shortName"),
+                                  team.get("fullName"), team.get("color")))
+
+        rows["games"].append((
+            game_id, info.get("date"), info["tournament"].get("name"), info["tournament"].get("shortName"),
+            info.get("venue"), info.get("attendance"), team_ids["home"], team_ids["away"],
+            teams["home"].get("goals"), teams["away"].get("goals"), info["result"].get("periodResults"),
+            int(bool(info["status"]["isEnded"])), int(bool(info["status"]["isOfficial"])), time.time()
+        ))
+
+        # Events name players by jersey number, the roster maps them to player IDs
+        jerseys = {"home": {}, "away": {}}
+        for side in ("home", "away"):
+            for group, is_goalie in (("goalies", True), ("players", False)):
+                for player in game["roster"][side][group]:
+                    rows["players"].append((player["id"], player["name"], player.get("position")))
+                    rows["game_players"].append((
+                        game_id, player["id"], team_ids[side], side, player.get("jerseyNo"),
+                        player.get("line"), int(bool(player.get("starter"))), int(is_goalie)
+                    ))
+                    jerseys[side][player.get("jerseyNo")] = player["id"]
+
+        timeline = GameTimeline(game["events"])
+        for event in game["events"]:
+            side = event.get("team")
+            player = event.get("player") or {}
+            jersey_no = player.get("jerseyNo")
+            rows["events"].append((
+                game_id, event["id"], event["period"], event["time"], timeline.seconds(event),
+                team_ids.get(side), side, event["type"], jerseys.get(side, {}).get(jersey_no),
+                player.get("name"), jersey_no, event.get("duration"), event.get("reason"),
+                event.get("strength"), event.get("scoreState"), int(bool(event.get("isHighlighted")))
+            ))
+            for position, assist in enumerate(event.get("assists", []), 1):
+                rows["assists"].append((
+                    game_id, event["id"], position, jerseys.get(side, {}).get(assist.get("jerseyNo")),
+                    assist.get("name"), assist.get("jerseyNo")
+                ))
+
+        statistics = game["statistics"]
+        periods = [(period_stats["period"], period_stats) for period_stats in statistics["byPeriod"]]
+        periods.append((0, statistics["total"]))
+        for period, period_stats in periods:
+            for side in ("home", "away"):
+                for stat, value in period_stats[side].items():
+                    number = value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+                    text = None if number is not None or value is None else str(value)
+                    rows["period_stats"].append((game_id, period, side, team_ids[side], stat, number, text))
+
+    def has_game(self, game_id: int) -> bool:
+        """Whether a game is in the archive"""
+        return self._query_one("SELECT 1 FROM games WHERE id = ?", (game_id,)) is not None
+
+    def game_ids(self) -> List[int]:
+        """Get the IDs of all archived games, oldest first"""
+        return [row["id"] for row in self._query("SELECT id FROM games ORDER BY date, id")]
+
+    def player_history(self, player_id: int) -> List[Dict[str, Any]]:
+        """
+        Get a player's games with goals, assists and penalty minutes.
+
+        Args:
+            player_id: ID of the player
+
+        Returns:
+            List of games, newest first
+        """
+        return self._query(
+            """
+            SELECT g.id AS game_id, g.date, gp.side, t.name AS team, o.name AS opponent,
+                   g.home_goals, g.away_goals, gp.jersey_no, gp.is_goalie,
+                   (SELECT COUNT(*) FROM events e
+                     WHERE e.game_id = g.id AND e.player_id = gp.player_id AND e.type = 'goal') AS goals,
+                   (SELECT COUNT(*) FROM assists a
+                     WHERE a.game_id = g.id AND a.player_id = gp.player_id) AS assists,
+                   (SELECT COALESCE(SUM(e.duration), 0) FROM events e
+                     WHERE e.game_id = g.id AND e.player_id = gp.player_id AND e.type = 'penalty') AS penalty_minutes
+            FROM game_players gp
+            JOIN games g ON g.id = gp.game_id
+            JOIN teams t ON t.id = gp.team_id
+            JOIN teams o ON o.id = CASE gp.side WHEN 'home' THEN g.away_team_id ELSE g.home_team_id END
+            WHERE gp.player_id = ?
+            ORDER BY g.date DESC, g.id DESC
+            """,
+            (player_id,)
+        )
+
+    def head_to_head(self, team_id: int, opponent_id: int) -> Dict[str, Any]:
+        """
+        Get the finished games between two teams and their record against each other.
+        Games still in progress are left out, their score is not a result.
+
+        Args:
+            team_id: ID of the first team
+            opponent_id: ID of the other team
+
+        Returns:
+            dict: "games" (newest first) and "wins", "losses" and "ties" of the first team
+        """
+        games = self._query(
+            """
+            SELECT id AS game_id, date, home_team_id, away_team_id, home_goals, away_goals, period_results
+            FROM games
+            WHERE ((home_team_id = ? AND away_team_id = ?) OR (home_team_id = ? AND away_team_id = ?))
+              AND is_ended = 1
+            ORDER BY date DESC, id DESC
+            """,
+            (team_id, opponent_id, opponent_id, team_id)
+        )
+
+        record = {"wins": 0, "losses": 0, "ties": 0}
+        for game in games:
+            goals_for, goals_against = game["home_goals"], game["away_goals"]
+            if game["away_team_id"] == team_id:
+                goals_for, goals_against = goals_against, goals_for
+            if goals_for > goals_against:
+                record["wins"] += 1
+            elif goals_for < goals_against:
+                record["losses"] += 1
+            else:
+                record["ties"] += 1
+        return {"games": games, **record}
+
+    def penalty_reasons(self, team_id: Optional[int] = None, player_id: Optional[int] = None,
+                        limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Get the most common penalty reasons.
+
+        Args:
+            team_id: Only count penalties of this team
+            player_id: Only count penalties of this player
+            limit: Maximum number of reasons
+
+        Returns:
+            List of {"reason", "count", "minutes"}, most common first
+        """
+        conditions = ["type = 'penalty'"]
+        params: List[Any] = []
+        if team_id is not None:
+            conditions.append("team_id = ?")
+            params.append(team_id)
+        if player_id is not None:
+            conditions.append("player_id = ?")
+            params.append(player_id)
+        params.append(limit)
+
+        return self._query(
+            f"""
+            SELECT COALESCE(reason, '') AS reason, COUNT(*) AS count, COALESCE(SUM(duration), 0) AS minutes
+            FROM events
+            WHERE {' AND '.join(conditions)}
+            GROUP BY reason
+            ORDER BY count DESC, minutes DESC
+            LIMIT ?
+            """,
+            tuple(params)
+        )
+
+    def _query(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        """Run a query and return its rows as dicts"""
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    def _query_one(self, sql: str, params: tuple = ()) -> Optional[Dict[str, Any]]:
+        """Run a query and return its first row as a dict"""
+        rows = self._query(sql, params)
+        return rows[0] if rows else None
+
+
+if __name__ == '__main__':
+    import sys
+    from swehockey import SwehockeyAPI
+
+    if len(sys.argv) < 3:
+        print("Usage: python archive.py <database> <game_id> [<game_id> ...]")
+        sys.exit(1)
+
+    api = SwehockeyAPI()
+    loaded = [api.load_game(int(game_id)).to_dict() for game_id in sys.argv[2:]]
+    archive = GameArchive(sys.argv[1])
+    print(f"Archived {archive.add_games(loaded)} games in {sys.argv[1]}")
+    archive.close()
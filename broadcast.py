@@ -0,0 +1,108 @@
+import queue
+import threading
+from typing import Any, Dict, List
+
+from metrics import metrics
+
+
+class Subscription:
+    """A single viewer's queue of messages for one game."""
+
+    def __init__(self, game_id: int, max_pending: int):
+        """
+        Initialize the subscription.
+
+        Args:
+            game_id: ID of the game the viewer follows
+            max_pending: Maximum number of undelivered messages before the viewer is dropped
+        """
+        self.game_id = game_id
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.closed = False
+
+    def get(self, timeout: float) -> Any:
+        """
+        Wait for the next message.
+
+        Args:
+            timeout: Seconds to wait
+
+        Returns:
+            The next message, or None if nothing arrived in time
+        """
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBroadcaster:
+    """
+    Fans out messages about a game to every connected viewer.
+
+    One refresh of a game publishes each change once; the broadcaster copies it
+    into the queue of every subscriber. Viewers that stop reading are dropped
+    once their queue is full, so they cannot hold up the others.
+    """
+
+    def __init__(self, max_pending: int = 100):
+        """
+        Initialize the broadcaster.
+
+        Args:
+            max_pending: Maximum number of undelivered messages per viewer
+        """
+        self.max_pending = max_pending
+        self._subscriptions: Dict[int, List[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, game_id: int) -> Subscription:
+        """Start receiving messages for a game"""
+        subscription = Subscription(game_id, self.max_pending)
+        with self._lock:
+            self._subscriptions.setdefault(game_id, []).append(subscription)
+        metrics.incr("sse.subscribers")
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Stop receiving messages"""
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.game_id, [])
+            if subscription in subscriptions:
+                subscriptions.remove(subscription)
+                metrics.incr("sse.subscribers", -1)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.game_id, None)
+        subscription.closed = True
+
+    def publish(self, game_id: int, message: Any) -> int:
+        """
+        Send a message to every viewer of a game.
+
+        Args:
+            game_id: ID of the game
+            message: Message to deliver
+
+        Returns:
+            int: Number of viewers the message was delivered to
+        """
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(game_id, []))
+
+        delivered = 0
+        for subscription in subscriptions:
+            try:
+                subscription.queue.put_nowait(message)
+                delivered += 1
+            except queue.Full:
+                # The viewer stopped reading; it reloads the page when it reconnects
+                self.unsubscribe(subscription)
+                metrics.incr("sse.dropped")
+
+        metrics.incr("sse.messages", delivered)
+        return delivered
+
+    def subscriber_count(self, game_id: int) -> int:
+        """Get the number of viewers of a game"""
+        with self._lock:
+            return len(self._subscriptions.get(game_id, []))
@@ -0,0 +1,106 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+
+from markupsafe import Markup
+
+from metrics import metrics
+
+
+class FragmentCache:
+    """
+    LRU cache of rendered HTML fragments of the game pages.
+
+    Fragments are keyed by the game sections they show (see
+    LazyGame.section_keys), so a block is rendered again only after one of its
+    sections changed; an event card is keyed by the event itself. Hits and
+    misses are counted per fragment name as fragments.<name>.hits/misses.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of fragments kept
+        """
+        self.max_entries = max_entries
+        self._fragments = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(name: str, game: Any, sections: Iterable[str] = (), data: Any = None,
+            extra: Hashable = None) -> Optional[tuple]:
+        """
+        Build the key of a fragment of a game.
+
+        Args:
+            name: Name of the fragment, e.g. "header"
+            game: Converted game data
+            sections: Sections of the game the fragment shows
+            data: Unhashable data the fragment shows besides the sections, e.g. one event
+            extra: Anything else the output depends on, e.g. the announcement text
+
+        Returns:
+            tuple: The key, or None if the game carries no section keys (plain dicts)
+        """
+        section_keys = getattr(game, "section_keys", None)
+        if not section_keys:
+            return None
+        try:
+            sections_key = tuple(section_keys[section] for section in sections)
+        except KeyError:
+            return None
+        return (name, sections_key, repr(data) if data is not None else None, extra)
+
+    def get(self, key: Optional[tuple], render: Callable[[], str]) -> Markup:
+        """
+        Get a cached fragment or render and cache it.
+
+        Args:
+            key: Key from FragmentCache.key(); None renders without caching
+            render: Renders the fragment on a cache miss
+
+        Returns:
+            Markup: The rendered HTML
+        """
+        if key is None:
+            return Markup(render())
+
+        name = key[0]
+        with self._lock:
+            fragment = self._fragments.get(key)
+            if fragment is not None:
+                self._fragments.move_to_end(key)
+                metrics.incr(f"fragments.{name}.hits")
+                return fragment
+
+        metrics.incr(f"fragments.{name}.misses")
+        fragment = Markup(render())
+        with self._lock:
+            self._fragments[key] = fragment
+            while len(self._fragments) > self.max_entries:
+                self._fragments.popitem(last=False)
+        return fragment
+
+    def clear(self) -> None:
+        """Drop all fragments, e.g. after templates changed"""
+        with self._lock:
+            self._fragments.clear()
+
+
+def hit_rates(values: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Hit rate of each fragment name from a metrics snapshot.
+
+    Returns:
+        dict: fragments.<name>.hit_rate mapped to the share of hits
+    """
+    names = {metric.rsplit(".", 1)[0] for metric in values
+             if metric.startswith("fragments.") and metric.endswith((".hits", ".misses"))}
+    rates = {}
+    for name in names:
+        hits = values.get(f"{name}.hits", 0)
+        total = hits + values.get(f"{name}.misses", 0)
+        rates[f"{name}.hit_rate"] = round(hits / total, 4) if total else 0.0
+    return rates
@@ -0,0 +1,169 @@
+import copy
+from typing import Any, Dict, List
+
+Patch = List[Dict[str, Any]]
+
+
+def escape(token: Any) -> str:
+    """Escape a key or index for use in a JSON Pointer (RFC 6901)"""
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def _has_ids(items: List[Any]) -> bool:
+    """Whether every item is an object with a unique "id", so items can be matched by ID"""
+    if not items or not all(isinstance(item, dict) and "id" in item for item in items):
+        return False
+    return len({item["id"] for item in items}) == len(items)
+
+
+def make_patch(old: Any, new: Any, path: str = "") -> Patch:
+    """
+    Create a JSON Patch (RFC 6902) turning one document into another.
+
+    Lists of objects with an "id" (events, players, coaches) are compared by ID,
+    so an added event is one "add" operation however many events follow it.
+    Other lists are compared by position. Identical subtrees are skipped without
+    being walked when they are the same object, which is the case for sections
+    carried over between snapshots.
+
+    Args:
+        old: Document before the change
+        new: Document after the change
+        path: JSON Pointer of the compared documents within the whole document
+
+    Returns:
+        List of operations, empty if the documents are equal
+    """
+    if old is new:
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        return _diff_objects(old, new, path)
+    if isinstance(old, list) and isinstance(new, list):
+        if _has_ids(old) and _has_ids(new):
+            return _diff_lists_by_id(old, new, path)
+        return _diff_lists_by_position(old, new, path)
+    if old == new and type(old) is type(new):
+        return []
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+def _diff_objects(old: Dict, new: Dict, path: str) -> Patch:
+    patch = []
+    for key in old:
+        if key not in new:
+            patch.append({"op": "remove", "path": f"{path}/{escape(key)}"})
+    for key, value in new.items():
+        if key not in old:
+            patch.append({"op": "add", "path": f"{path}/{escape(key)}", "value": value})
+        else:
+            patch.extend(make_patch(old[key], value, f"{path}/{escape(key)}"))
+    return patch
+
+
+def _diff_lists_by_position(old: List, new: List, path: str) -> Patch:
+    patch = []
+    for index in range(min(len(old), len(new))):
+        patch.extend(make_patch(old[index], new[index], f"{path}/{index}"))
+    # Remove from the end so the remaining indexes stay valid
+    for index in range(len(old) - 1, len(new) - 1, -1):
+        patch.append({"op": "remove", "path": f"{path}/{index}"})
+    for index in range(len(old), len(new)):
+        patch.append({"op": "add", "path": f"{path}/{index}", "value": new[index]})
+    return patch
+
+
+def _diff_lists_by_id(old: List[Dict], new: List[Dict], path: str) -> Patch:
+    patch = []
+    new_ids = {item["id"] for item in new}
+    old_by_id = {item["id"]: item for item in old}
+
+    # IDs in the list as the operations so far leave it
+    working = [item["id"] for item in old]
+    for index in range(len(working) - 1, -1, -1):
+        if working[index] not in new_ids:
+            patch.append({"op": "remove", "path": f"{path}/{index}"})
+            del working[index]
+
+    for index, item in enumerate(new):
+        item_id = item["id"]
+        if index < len(working) and working[index] == item_id:
+            patch.extend(make_patch(old_by_id[item_id], item, f"{path}/{index}"))
+        elif item_id in old_by_id:
+            position = working.index(item_id, index)
+            patch.append({"op": "move", "from": f"{path}/{position}", "path": f"{path}/{index}"})
+            working.insert(index, working.pop(position))
+            patch.extend(make_patch(old_by_id[item_id], item, f"{path}/{index}"))
+        else:
+            patch.append({"op": "add", "path": f"{path}/{index}", "value": item})
+            working.insert(index, item_id)
+    return patch
+
+
+def _parse_pointer(pointer: str) -> List[str]:
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise ValueError(f"Invalid JSON Pointer: {pointer!r}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def _resolve(document: Any, tokens: List[str]) -> Any:
+    for token in tokens:
+        document = document[int(token)] if isinstance(document, list) else document[token]
+    return document
+
+
+def apply_patch(document: Any, patch: Patch) -> Any:
+    """
+    Apply a JSON Patch made by make_patch to a copy of a document.
+
+    Supports the add, remove, replace and move operations.
+
+    Args:
+        document: Document to patch, which is not modified
+        patch: Operations to apply in order
+
+    Returns:
+        The patched document
+
+    Raises:
+        ValueError: If an operation is not supported or does not fit the document
+    """
+    document = copy.deepcopy(document)
+    for operation in patch:
+        op = operation.get("op")
+        tokens = _parse_pointer(operation["path"])
+        try:
+            if op == "move":
+                source = _parse_pointer(operation["from"])
+                value = _remove(_resolve(document, source[:-1]), source[-1])
+                op, operation = "add", {"value": value}
+            if not tokens:
+                if op not in ("add", "replace"):
+                    raise ValueError(f"Cannot {op} the whole document")
+                document = copy.deepcopy(operation["value"])
+                continue
+
+            parent, token = _resolve(document, tokens[:-1]), tokens[-1]
+            if op == "add":
+                value = copy.deepcopy(operation["value"])
+                if isinstance(parent, list):
+                    parent.insert(len(parent) if token == "-" else int(token), value)
+                else:
+                    parent[token] = value
+            elif op == "remove":
+                _remove(parent, token)
+            elif op == "replace":
+                _resolve(document, tokens)  # The target must exist
+                parent[int(token) if isinstance(parent, list) else token] = copy.deepcopy(operation["value"])
+            else:
+                raise ValueError(f"Unsupported operation: {op!r}")
+        except (KeyError, IndexError, TypeError) as e:
+            raise ValueError(f"Cannot apply {operation!r}: {e}") from e
+    return document
+
+
+def _remove(parent: Any, token: str) -> Any:
+    if isinstance(parent, list):
+        return parent.pop(int(token))
+    return parent.pop(token)
@@ -0,0 +1,467 @@
+"""
+Load test of the web app against a fake Swehockey API and the stub TTS backend.
+
+Operators and viewers are simulated by threads, each with its own session.
+Operators load games, refresh them and synthesize announcements; viewers read
+the summary, lineups and actions pages. Latency percentiles and throughput are
+reported per route and can be gated against a stored baseline:
+
+    python loadtest.py --duration 30 --write-baseline loadtest_baseline.json
+    python loadtest.py --duration 30 --baseline loadtest_baseline.json
+
+The exit status is 1 if a gated percentile exceeds the baseline by more than
+the budget, or a route fails too often.
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+PERCENTILES = {"p50": 50, "p95": 95, "p99": 99}
+
+# Routes requested by each role, with their weights
+OPERATOR_MIX = [
+    ("/actions", 30),
+    ("/refresh/actions", 20),
+    ("/tts", 20),
+    ("/summary", 10),
+    ("/lineups", 10),
+    ("/refresh/summary", 5),
+    ("/load_game", 5),
+]
+VIEWER_MIX = [
+    ("/actions", 50),
+    ("/summary", 25),
+    ("/lineups", 20),
+    ("/load_game", 5),
+]
+
+TTS_TEXTS = [
+    "Mål för {team}! Nummer {number} gör mål, assist av nummer {assist}.",
+    "Utvisning på nummer {number}, två minuter.",
+    "Välkomna till dagens match mellan {team} och gästerna.",
+]
+
+
+def _team(team_id: int, name: str, goals: int) -> Dict[str, Any]:
+    return {"Id": team_id, "ClubId": team_id * 10, "Name": name, "Shortname": name[:3].upper(), "Fullname": name,
+            "Color": "#ffffff", "ClubHasLogo": False, "Goals": goals}
+
+
+def fake_lineups(game_id: int) -> Dict[str, Any]:
+    """LineUps payload of a fake game with three lines per team"""
+    lines = []
+    player_id = game_id * 1000
+    for line in range(1, 4):
+        players = []
+        for _ in range(5):
+            player_id += 1
+            players.append({
+                "Home": {"Id": player_id, "JerseyNo": player_id % 90 + 2, "Name": f"Hemma Spelare{player_id}",
+                         "Position": "F", "Starts": line == 1},
+                "Guest": {"Id": player_id + 500, "JerseyNo": player_id % 90 + 2, "Name": f"Borta Spelare{player_id}",
+                          "Position": "D", "Starts": line == 1}
+            })
+        lines.append({"Id": line, "Name": f"Kedja {line}", "Players": players})
+    lines.append({"Id": 0, "Name": "Målvakter", "Players": [
+        {"Home": {"Id": game_id * 1000 + 998, "JerseyNo": 1, "Name": "Hemma Målvakt", "Position": "GK", "Starts": True},
+         "Guest": {"Id": game_id * 1000 + 999, "JerseyNo": 30, "Name": "Borta Målvakt", "Position": "GK", "Starts": True}}
+    ]})
+    return {"GameTicker": {
+        "Id": game_id, "GameDate": "2025-01-02T19:00:00", "TournamentGroupShortName": "J18",
+        "IsStarted": True, "IsEnded": False, "IsOfficial": False, "CurrentSituation": "Period 2",
+        "Home": _team(11, "Hemmalaget HC", 2), "Guest": _team(12, "Bortalaget IF", 1),
+        "PeriodResults": "2-1 (1-0, 1-1)",
+        "LineUp": {"Lines": lines, "TeamOfficials": [
+            {"Home": {"Id": 5, "Name": "Tränare Hemma", "Type": "HC"}, "Guest": {"Id": 6, "Name": "Tränare Borta", "Type": "HC"}}
+        ]},
+        "OfficialTypes": [{"Name": "Domare", "Officials": [{"Id": 7, "Name": "Domare Ett"}]}]
+    }}
+
+
+def fake_summary(game_id: int, shots: int) -> Dict[str, Any]:
+    """Summary payload of a fake game"""
+    def team_item(name, home, guest):
+        return {"Name": name, "TeamItem": {"ValueHome": home, "ValueGuest": guest}, "InfoItem": None}
+
+    def info_item(name, value):
+        return {"Name": name, "TeamItem": None, "InfoItem": {"ValueStr": value}}
+
+    return {"GameTicker": {"Categories": [
+        {"Name": "Matchinformation", "Items": [info_item("Serie", "J18 Div 1"), info_item("Arena", "Arenan"),
+                                               info_item("Åskådare", "250")]},
+        {"Name": "Period 1", "Items": [team_item("Mål", "1", "0"), team_item("Skott", str(shots), "8"),
+                                       team_item("Utvisningsminuter", "2", "4")]},
+        {"Name": "Totalt", "Items": [team_item("Mål", "2", "1"), team_item("Skott", f"10,00% ({shots})", "6,67% (15)"),
+                                     team_item("Räddningar", "93,33% (14)", "89,47% (17)"),
+                                     team_item("PP", "50,00% (03:09)", "0,00% (01:00)"),
+                                     team_item("Utvisningsminuter", "2", "6")]}
+    ]}}
+
+
+def fake_actions(game_id: int, event_count: int) -> Dict[str, Any]:
+    """Actions payload of a fake game with alternating goals and penalties"""
+    periods = {}
+    for index in range(event_count):
+        seconds = 60 + index * 45
+        period = min(seconds // 1200 + 1, 3)
+        is_home = index % 2 == 0
+        number = (game_id * 1000 + index % 15 + 1) % 90 + 2
+        side = "Hemma" if is_home else "Borta"
+        event = {"Id": index + 1, "Time": f"{seconds // 60:02d}:{seconds % 60:02d}", "IsHome": is_home,
+                 "IsHighlighted": index % 3 == 0, "Player": f"{number} {side} Spelare{game_id * 1000 + index % 15 + 1}",
+                 "Assist": ""}
+        if index % 3 == 0:
+            event.update({"EventTypeId": 3, "Description": f"{index // 6 + 1}-{index // 6} (EQ)", "ExtraInfo": ""})
+        else:
+            event.update({"EventTypeId": 4, "Description": "2 min", "ExtraInfo": "Hakning"})
+        periods.setdefault(period, []).append(event)
+    return {"GameTicker": {"Periods": [{"Id": period, "Events": events} for period, events in sorted(periods.items())]},
+            "Timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+class FakeUpstream:
+    """
+    Local stand-in for the Swehockey API.
+
+    Every game gains an event each event_interval seconds, so refreshes find
+    changes as they would during a live game.
+    """
+
+    def __init__(self, event_interval: float = 5.0, latency: float = 0.0):
+        """
+        Args:
+            event_interval: Seconds between new events in each game
+            latency: Seconds to wait before answering, to imitate the real API
+        """
+        self.event_interval = event_interval
+        self.latency = latency
+        self.started = time.time()
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    def payload(self, endpoint: str, game_id: int) -> Optional[Dict[str, Any]]:
+        elapsed = time.time() - self.started
+        if endpoint == "LineUps":
+            return fake_lineups(game_id)
+        if endpoint == "Summary":
+            return fake_summary(game_id, 10 + int(elapsed // (self.event_interval * 2)))
+        if endpoint == "Actions":
+            return fake_actions(game_id, 10 + int(elapsed // self.event_interval))
+        return None
+
+    def start(self, port: int = 0) -> str:
+        """Start serving in a thread and return the base URL"""
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with upstream._lock:
+                    upstream.requests += 1
+                parts = self.path.strip("/").split("/")
+                payload = None
+                if len(parts) >= 2 and parts[-1].isdigit():
+                    payload = upstream.payload(parts[-2], int(parts[-1]))
+                if upstream.latency:
+                    time.sleep(upstream.latency)
+                body = json.dumps(payload).encode("utf-8") if payload is not None else b"{}"
+                self.send_response(200 if payload is not None else 404)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_address[1]}/GameTicker/"
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_app(upstream_url: str, workdir: str, tts_delay: float, poller: bool) -> Tuple[subprocess.Popen, str]:
+    """
+    Start the app in a threaded development server in a separate process.
+
+    Returns:
+        The process and the app's base URL
+    """
+    port = _free_port()
+    env = dict(os.environ,
+               SWEHOCKEY_BASE_URL=upstream_url,
+               TTS_BACKEND="stub",
+               TTS_STUB_DELAY=str(tts_delay),
+               TTS_CACHE_DIR=os.path.join(workdir, "tts_cache"),
+               SWEHOCKEY_STORE=os.path.join(workdir, "shared.sqlite3"),
+               POLLER_ENABLED="1" if poller else "0",
+               SECRET_KEY="loadtest")
+    code = ("from werkzeug.serving import run_simple\n"
+            "from app import create_app\n"
+            f"run_simple('127.0.0.1', {port}, create_app(), threaded=True)\n")
+    process = subprocess.Popen([sys.executable, "-c", code], env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("The app exited during startup")
+        try:
+            requests.get(url + "/metrics", timeout=1)
+            return process, url
+        except requests.RequestException:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("The app did not start within 30 seconds")
+
+
+class Recorder:
+    """Collects the latency of every request by route"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.recording = False
+        self._lock = threading.Lock()
+
+    def record(self, route: str, seconds: float, ok: bool) -> None:
+        if not self.recording:
+            return
+        with self._lock:
+            self.latencies.setdefault(route, []).append(seconds)
+            if not ok:
+                self.errors[route] = self.errors.get(route, 0) + 1
+
+
+def percentile(sorted_values: List[float], percent: float) -> float:
+    """Nearest-rank percentile of sorted values"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def run_user(base_url: str, role: str, game_ids: List[int], recorder: Recorder, stop: threading.Event,
+             think_time: float, seed: int) -> None:
+    """Request routes of a role's mix until stopped"""
+    rnd = random.Random(seed)
+    mix = OPERATOR_MIX if role == "operator" else VIEWER_MIX
+    routes = [route for route, _ in mix]
+    weights = [weight for _, weight in mix]
+    session = requests.Session()
+
+    def request(route: str) -> None:
+        # Redirects are followed: the session routes redirect to /game/<id>/..., and
+        # the latency of a route is the time until the user sees the resulting page
+        started = time.perf_counter()
+        try:
+            if route == "/load_game":
+                response = session.post(base_url + route, data={"game_id": rnd.choice(game_ids)}, timeout=30)
+                # A failed load redirects back to the index page
+                ok = response.ok and "/game/" in response.url
+            elif route == "/tts":
+                text = rnd.choice(TTS_TEXTS).format(team="Hemmalaget", number=rnd.randint(2, 40),
+                                                     assist=rnd.randint(2, 40))
+                response = session.get(base_url + route, params={"text": text}, timeout=30)
+                ok = response.ok and len(response.content) > 0
+            else:
+                response = session.get(base_url + route, timeout=30)
+                ok = response.ok and "/game/" in response.url
+        except requests.RequestException:
+            ok = False
+        recorder.record(route, time.perf_counter() - started, ok)
+
+    request("/load_game")
+    while not stop.is_set():
+        request(rnd.choices(routes, weights)[0])
+        if think_time:
+            stop.wait(rnd.uniform(0, 2 * think_time))
+
+
+def summarize(recorder: Recorder, duration: float) -> Dict[str, Dict[str, Any]]:
+    """Percentiles in milliseconds, throughput and errors per route"""
+    results = {}
+    for route, latencies in sorted(recorder.latencies.items()):
+        latencies = sorted(latencies)
+        result = {"requests": len(latencies), "errors": recorder.errors.get(route, 0),
+                  "throughput": round(len(latencies) / duration, 2)}
+        for name, percent in PERCENTILES.items():
+            result[name] = round(percentile(latencies, percent) * 1000, 2)
+        result["max"] = round(latencies[-1] * 1000, 2)
+        results[route] = result
+    return results
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], gates: List[str], budget: float,
+            slack_ms: float, max_error_rate: float) -> List[str]:
+    """
+    Compare results with a baseline.
+
+    A gated percentile fails if it exceeds baseline * (1 + budget) + slack_ms.
+    The baseline may set its own budgets per route and percentile, e.g.
+    {"budgets": {"/tts": {"p99": 0.5}}}.
+
+    Returns:
+        List of failure descriptions, empty if everything is within budget
+    """
+    failures = []
+    budgets = baseline.get("budgets", {})
+    for route, result in results.items():
+        if result["errors"] > max_error_rate * result["requests"]:
+            failures.append(f"{route}: {result['errors']} of {result['requests']} requests failed")
+
+        base = baseline.get("routes", {}).get(route)
+        if base is None:
+            continue
+        for gate in gates:
+            route_budget = budgets.get(route, {}).get(gate, budget)
+            limit = base[gate] * (1 + route_budget) + slack_ms
+            if result[gate] > limit:
+                failures.append(f"{route}: {gate} {result[gate]:.1f} ms exceeds {limit:.1f} ms "
+                                f"(baseline {base[gate]:.1f} ms, budget {route_budget:.0%} + {slack_ms:g} ms)")
+    return failures
+
+
+def print_results(results: Dict[str, Dict[str, Any]], baseline: Optional[Dict[str, Any]]) -> None:
+    print(f"{'route':<20}{'requests':>10}{'errors':>8}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for route, result in results.items():
+        print(f"{route:<20}{result['requests']:>10}{result['errors']:>8}{result['throughput']:>9.1f}"
+              f"{result['p50']:>10.1f}{result['p95']:>10.1f}{result['p99']:>10.1f}{result['max']:>10.1f}")
+        base = (baseline or {}).get("routes", {}).get(route)
+        if base:
+            print(f"{'  baseline':<20}{base['requests']:>10}{base['errors']:>8}{base['throughput']:>9.1f}"
+                  f"{base['p50']:>10.1f}{base['p95']:>10.1f}{base['p99']:>10.1f}{base['max']:>10.1f}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load test the app against a fake Swehockey API")
+    parser.add_argument("--operators", type=int, default=2, help="Concurrent operators")
+    parser.add_argument("--viewers", type=int, default=20, help="Concurrent viewers")
+    parser.add_argument("--games", type=int, default=3, help="Number of games the users spread over")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to measure")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Seconds of load before measuring")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Mean pause between a user's requests")
+    parser.add_argument("--upstream-latency", type=float, default=0.05, help="Seconds the fake API takes to answer")
+    parser.add_argument("--event-interval", type=float, default=5.0, help="Seconds between new events per game")
+    parser.add_argument("--tts-delay", type=float, default=0.01, help="Seconds per chunk of the stub TTS backend")
+    parser.add_argument("--poller", action="store_true", help="Run the background poller in the app")
+    parser.add_argument("--target", help="Base URL of an already running app instead of starting one, e.g. under "
+                                         "gunicorn; its SWEHOCKEY_BASE_URL must point to the fake API")
+    parser.add_argument("--upstream-port", type=int, default=0, help="Port of the fake API, random by default")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare with this results file and fail on regressions")
+    parser.add_argument("--write-baseline", help="Write the results as a new baseline to this file")
+    parser.add_argument("--gate", default="p95,p99", help="Percentiles compared with the baseline")
+    parser.add_argument("--budget", type=float, default=0.25, help="Allowed relative regression of a percentile")
+    parser.add_argument("--slack-ms", type=float, default=5.0, help="Allowed absolute regression in milliseconds")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="Allowed share of failed requests")
+    args = parser.parse_args()
+
+    gates = [gate.strip() for gate in args.gate.split(",") if gate.strip()]
+    unknown = [gate for gate in gates if gate not in PERCENTILES]
+    if unknown:
+        parser.error(f"Unknown percentiles: {', '.join(unknown)}")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    upstream = FakeUpstream(event_interval=args.event_interval, latency=args.upstream_latency)
+    upstream_url = upstream.start(args.upstream_port)
+    process = None
+    workdir = tempfile.mkdtemp(prefix="loadtest-")
+    try:
+        if args.target:
+            base_url = args.target.rstrip("/")
+            print(f"Fake API for the target's SWEHOCKEY_BASE_URL: {upstream_url}")
+        else:
+            process, base_url = start_app(upstream_url, workdir, args.tts_delay, args.poller)
+
+        recorder = Recorder()
+        stop = threading.Event()
+        game_ids = list(range(1, args.games + 1))
+        roles = ["operator"] * args.operators + ["viewer"] * args.viewers
+        threads = [threading.Thread(target=run_user, daemon=True,
+                                    args=(base_url, role, game_ids, recorder, stop, args.think_time, index))
+                   for index, role in enumerate(roles)]
+        for thread in threads:
+            thread.start()
+
+        time.sleep(args.warmup)
+        recorder.recording = True
+        started = time.perf_counter()
+        time.sleep(args.duration)
+        recorder.recording = False
+        duration = time.perf_counter() - started
+        stop.set()
+        for thread in threads:
+            thread.join(timeout=35)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+        upstream.stop()
+
+    results = summarize(recorder, duration)
+    report = {
+        "config": {"operators": args.operators, "viewers": args.viewers, "games": args.games,
+                   "duration": args.duration, "thinkTime": args.think_time,
+                   "upstreamLatency": args.upstream_latency, "ttsDelay": args.tts_delay},
+        "routes": results,
+        "upstreamRequests": upstream.requests
+    }
+    print_results(results, baseline)
+    print(f"Upstream requests: {upstream.requests}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.write_baseline:
+        if baseline is None and os.path.exists(args.write_baseline):
+            with open(args.write_baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+        # Keep hand-written budgets of an existing baseline
+        if baseline and "budgets" in baseline:
+            report["budgets"] = baseline["budgets"]
+        with open(args.write_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.write_baseline}")
+
+    if baseline is not None:
+        if baseline.get("config") != report["config"]:
+            print("Warning: the baseline was recorded with another configuration")
+        failures = compare(results, baseline, gates, args.budget, args.slack_ms, args.max_error_rate)
+        for failure in failures:
+            print(f"FAIL {failure}")
+        if failures:
+            return 1
+        print("All routes within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
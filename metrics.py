@@ -0,0 +1,57 @@
+import threading
+from typing import Dict, Union
+
+Number = Union[int, float]
+
+
+class Metrics:
+    """
+    Thread-safe registry of named counters and gauges.
+    Used to expose cache hit rates and timings from the running app.
+    """
+
+    def __init__(self):
+        """Initialize an empty metrics registry."""
+        self._values: Dict[str, Number] = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, amount: Number = 1) -> None:
+        """
+        Increment a counter.
+
+        Args:
+            name: Counter name (e.g., "tts_cache.hits")
+            amount: Value to add to the counter
+        """
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + amount
+
+    def set(self, name: str, value: Number) -> None:
+        """
+        Set a gauge to an absolute value.
+
+        Args:
+            name: Gauge name (e.g., "startup.import_seconds")
+            value: New value of the gauge
+        """
+        with self._lock:
+            self._values[name] = value
+
+    def get(self, name: str, default: Number = 0) -> Number:
+        """Get the current value of a counter or gauge."""
+        with self._lock:
+            return self._values.get(name, default)
+
+    def snapshot(self) -> Dict[str, Number]:
+        """
+        Get a consistent copy of all counters and gauges.
+
+        Returns:
+            dict: Metric names mapped to their current values
+        """
+        with self._lock:
+            return dict(self._values)
+
+
+# Process-wide registry shared by the app and its caches
+metrics = Metrics()
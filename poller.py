@@ -0,0 +1,336 @@
+import heapq
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from metrics import metrics
+from registry import EventChange, GameEntry, GameRegistry
+from store import SharedStore
+
+
+class RequestBudget:
+    """
+    Token bucket limiting the number of upstream requests across all games.
+
+    With a shared store, the bucket is kept in the store and shared by all
+    worker processes, so the budget limits the server as a whole however many
+    workers poll; otherwise it only limits this process.
+    """
+
+    def __init__(self, requests_per_minute: float, burst: Optional[int] = None,
+                 store: Optional[SharedStore] = None, key: str = "request_budget"):
+        """
+        Initialize the budget.
+
+        Args:
+            requests_per_minute: Sustained number of requests allowed per minute
+            burst: Maximum number of requests that can be made at once
+            store: Store shared by the worker processes to keep the bucket in
+            key: Key of the bucket in the store
+        """
+        self.rate = requests_per_minute / 60.0
+        self.capacity = burst if burst is not None else max(1, int(requests_per_minute // 6))
+        self.store = store
+        self.key = key
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self, tokens: int = 1) -> bool:
+        """
+        Take tokens from the budget if enough are available.
+
+        Args:
+            tokens: Number of upstream requests about to be made
+
+        Returns:
+            bool: True if the requests may be made now
+        """
+        if self.store is not None:
+            try:
+                return self._try_acquire_shared(tokens)
+            except sqlite3.Error:
+                metrics.incr("poller.budget_store_errors")  # Fall back to this process's bucket
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < tokens:
+                return False
+            self._tokens -= tokens
+            return True
+
+    def _try_acquire_shared(self, tokens: int) -> bool:
+        granted = []
+
+        def take(bucket):
+            # [tokens, Unix time of the last update]; wall clock, since it is shared between processes
+            now = time.time()
+            available, updated = bucket or (self.capacity, now)
+            available = min(self.capacity, available + max(now - updated, 0) * self.rate)
+            if available >= tokens:
+                available -= tokens
+                granted.append(True)
+            return [available, now]
+
+        self.store.update(self.key, take)
+        return bool(granted)
+
+
+class GamePoller:
+    """
+    Background scheduler that keeps watched games fresh.
+
+    Actions, Summary and LineUps are polled on their own intervals, which adapt
+    to the game status: fast during play and after bursts of events, slow in
+    intermissions and before the game, and not at all once the game is official.
+    All polls share one global request budget.
+    """
+
+    SECTIONS = ("actions", "summary", "lineups")
+
+    # Upstream requests made by one refresh of each section
+    REQUEST_COST = {"actions": 1, "summary": 1, "lineups": 1}
+
+    # Poll interval in seconds per game phase and section (None stops polling)
+    INTERVALS = {
+        "pregame": {"actions": 120, "summary": 300, "lineups": 60},
+        "play": {"actions": 10, "summary": 60, "lineups": 600},
+        "intermission": {"actions": 60, "summary": 120, "lineups": 600},
+        "ended": {"actions": 300, "summary": 300, "lineups": None},
+        "official": {"actions": None, "summary": None, "lineups": None}
+    }
+
+    # currentSituation texts that mean the puck is not in play
+    INTERMISSION_KEYWORDS = ("paus", "intermission")
+
+    # Actions are polled faster when this many changes happened recently
+    BUSY_EVENT_COUNT = 2
+    BUSY_WINDOW = 120.0
+    BUSY_ACTIONS_INTERVAL = 5
+
+    # Longest interval used while backing off after errors or an exhausted budget
+    MAX_BACKOFF = 300
+
+    # Seconds between purges of expired values from the shared store
+    PURGE_INTERVAL = 600
+
+    def __init__(self, registry: GameRegistry, budget: Optional[RequestBudget] = None,
+                 store: Optional[SharedStore] = None):
+        """
+        Initialize the poller.
+
+        Args:
+            registry: Registry of loaded games to refresh
+            budget: Global upstream request budget, defaults to 60 requests per minute
+            store: Shared store whose expired values are purged every PURGE_INTERVAL seconds
+        """
+        self.registry = registry
+        self.budget = budget or RequestBudget(60)
+        self.store = store
+        self._purged_at = time.monotonic()
+        self._schedule: List[Tuple[float, int, str]] = []
+        self._due: Dict[Tuple[int, str], float] = {}
+        self._failures: Dict[Tuple[int, str], int] = {}
+        self._recent_changes: Dict[int, deque] = {}
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopped = False
+
+        registry.add_listener(self._record_changes)
+
+    def start(self) -> None:
+        """Start the scheduler thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="game-poller", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the scheduler thread"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+    def watch(self, game_id: int) -> None:
+        """
+        Start polling a loaded game.
+
+        Args:
+            game_id: ID of the game
+        """
+        entry = self.registry.get(game_id)
+        if entry is None:
+            return
+        for section in self.SECTIONS:
+            if (game_id, section) not in self._due:
+                interval = self.interval(section, entry)
+                if interval is not None:
+                    self._schedule_poll(game_id, section, interval)
+
+    def unwatch(self, game_id: int) -> None:
+        """Stop polling a game"""
+        with self._condition:
+            for section in self.SECTIONS:
+                self._due.pop((game_id, section), None)
+                self._failures.pop((game_id, section), None)
+            self._recent_changes.pop(game_id, None)
+
+    def watched_games(self) -> List[int]:
+        """Get the IDs of all games being polled"""
+        with self._condition:
+            return sorted({game_id for game_id, _ in self._due})
+
+    def phase(self, game: Dict) -> str:
+        """
+        Classify the state of a game for choosing poll intervals.
+
+        Args:
+            game: Converted game data
+
+        Returns:
+            str: "pregame", "play", "intermission", "ended" or "official"
+        """
+        status = game["game"]["status"]
+        if status["isOfficial"]:
+            return "official"
+        if status["isEnded"]:
+            return "ended"
+        if not status["isStarted"]:
+            return "pregame"
+        situation = (status.get("currentSituation") or "").lower()
+        if any(keyword in situation for keyword in self.INTERMISSION_KEYWORDS):
+            return "intermission"
+        return "play"
+
+    def interval(self, section: str, entry: GameEntry) -> Optional[float]:
+        """
+        Get the time until the next poll of a section.
+
+        Args:
+            section: "actions", "summary" or "lineups"
+            entry: The loaded game
+
+        Returns:
+            float: Seconds until the next poll, or None to stop polling the section
+        """
+        phase = self.phase(entry.data)
+        interval = self.INTERVALS[phase][section]
+
+        if interval is not None and section == "actions" and phase == "play":
+            if self._recent_change_count(entry.game_id) >= self.BUSY_EVENT_COUNT:
+                interval = min(interval, self.BUSY_ACTIONS_INTERVAL)
+
+        return interval
+
+    def _record_changes(self, entry: GameEntry, changes: List[EventChange]) -> None:
+        """Registry listener remembering when events changed, for the event rate"""
+        now = time.monotonic()
+        with self._condition:
+            times = self._recent_changes.setdefault(entry.game_id, deque(maxlen=50))
+            times.extend([now] * len(changes))
+
+    def _recent_change_count(self, game_id: int) -> int:
+        """Number of event changes in the busy window"""
+        cutoff = time.monotonic() - self.BUSY_WINDOW
+        with self._condition:
+            return sum(1 for t in self._recent_changes.get(game_id, ()) if t >= cutoff)
+
+    def _schedule_poll(self, game_id: int, section: str, delay: float) -> None:
+        """Schedule the next poll of a section"""
+        due = time.monotonic() + delay
+        with self._condition:
+            self._due[(game_id, section)] = due
+            heapq.heappush(self._schedule, (due, game_id, section))
+            self._condition.notify()
+
+    def _next_due(self) -> Optional[Tuple[int, str]]:
+        """Wait until a poll is due and return it, or None when stopped"""
+        with self._condition:
+            while not self._stopped:
+                if not self._schedule:
+                    self._condition.wait()
+                    continue
+                due, game_id, section = self._schedule[0]
+                if self._due.get((game_id, section)) != due:
+                    # Unwatched or rescheduled since this item was pushed
+                    heapq.heappop(self._schedule)
+                    continue
+                delay = due - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+                heapq.heappop(self._schedule)
+                del self._due[(game_id, section)]
+                return game_id, section
+        return None
+
+    def _run(self) -> None:
+        """Scheduler loop"""
+        while True:
+            due = self._next_due()
+            if due is None:
+                return
+            self._poll(*due)
+            self._purge_store()
+
+    def _purge_store(self) -> None:
+        """Delete expired values from the shared store, e.g. old payloads and hot game marks"""
+        if self.store is None or time.monotonic() - self._purged_at < self.PURGE_INTERVAL:
+            return
+        self._purged_at = time.monotonic()
+        try:
+            metrics.incr("poller.store_purged", self.store.purge_expired())
+        except sqlite3.Error as e:
+            print(f"Error purging the shared store: {e}")
+
+    def _poll(self, game_id: int, section: str) -> None:
+        """Refresh one section of a game and schedule its next poll"""
+        key = (game_id, section)
+        entry = self.registry.get(game_id)
+        if entry is None:
+            return  # Game was unloaded
+
+        if not self.budget.try_acquire(self.REQUEST_COST[section]):
+            metrics.incr("poller.budget_exhausted")
+            self._retry_later(key, entry)
+            return
+
+        try:
+            entry = self.registry.refresh(game_id, section)
+        except Exception:
+            metrics.incr("poller.errors")
+            self._retry_later(key, entry)
+            return
+
+        if entry.data.get("stale"):
+            # The upstream failed and the last good data was kept
+            metrics.incr("poller.stale")
+            self._retry_later(key, entry)
+            return
+        self._failures.pop(key, None)
+        metrics.incr(f"poller.polls.{section}")
+
+        interval = self.interval(section, entry)
+        if interval is not None:
+            self._schedule_poll(game_id, section, interval)
+        else:
+            metrics.incr("poller.stopped")
+
+    def _retry_later(self, key: Tuple[int, str], entry: GameEntry) -> None:
+        """Schedule a failed or skipped poll again after a backoff, unless the section is no longer polled"""
+        game_id, section = key
+        interval = self.interval(section, entry)
+        if interval is None:
+            self._failures.pop(key, None)
+            metrics.incr("poller.stopped")
+            return
+        self._schedule_poll(game_id, section, self._backoff(key, interval))
+
+    def _backoff(self, key: Tuple[int, str], interval: float) -> float:
+        """Exponentially growing delay after consecutive failed polls"""
+        failures = self._failures.get(key, 0) + 1
+        self._failures[key] = failures
+        return min(self.MAX_BACKOFF, max(interval, 5) * 2 ** failures)
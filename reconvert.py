@@ -0,0 +1,186 @@
+"""
+Convert the raw payloads of every archived game again, e.g. after a change of
+the conversion logic, without calling the API.
+
+Games are read from a season archive (see season_archive.py) and converted in
+chunks by a pool of processes. Each chunk is written in one transaction to a
+game archive (see archive.py) and/or as one JSON file per game:
+
+    python reconvert.py season.swa --database games.sqlite3 --output-dir converted/
+
+A sample of games is converted again in this process to check that the
+conversion is deterministic, and compared with the earlier JSON output to show
+what the new conversion logic changed. The exit status is 1 if a sampled game
+converts differently twice.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+
+from archive import GameArchive
+from json_patch import make_patch
+from season_archive import SeasonArchive
+from swehockey import SwehockeyAPI
+
+# Archive and converter of a worker process, opened once per process
+_archive: Optional[SeasonArchive] = None
+_converter: Optional[SwehockeyAPI] = None
+
+
+def _init_worker(archive_path: str) -> None:
+    global _archive, _converter
+    _archive = SeasonArchive(archive_path)
+    _converter = SwehockeyAPI()
+
+
+def convert_game(archive: SeasonArchive, converter: SwehockeyAPI, game_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Convert the latest archived payloads of a game.
+
+    Returns:
+        dict: Converted game data, or None if an endpoint was never archived
+    """
+    payloads = archive.snapshot(game_id)
+    if payloads is None:
+        return None
+    return converter._convert_hockey_data(payloads["LineUps"], payloads["Summary"], payloads["Actions"])
+
+
+def convert_chunk(game_ids: List[int]) -> Tuple[Dict[int, Dict[str, Any]], List[int], Dict[int, str]]:
+    """
+    Convert a chunk of games in a worker process.
+
+    Returns:
+        Converted games keyed by ID, IDs of games with missing payloads and
+        errors keyed by game ID
+    """
+    converted, missing, errors = {}, [], {}
+    for game_id in game_ids:
+        try:
+            game = convert_game(_archive, _converter, game_id)
+        except Exception as e:
+            errors[game_id] = f"{type(e).__name__}: {e}"
+            continue
+        if game is None:
+            missing.append(game_id)
+        else:
+            converted[game_id] = game
+    return converted, missing, errors
+
+
+def _json_path(output_dir: str, game_id: int) -> str:
+    return os.path.join(output_dir, f"game_{game_id}.json")
+
+
+def _read_json(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path: str, game: Dict[str, Any]) -> None:
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(game, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
+
+
+def _general_path(path: str) -> str:
+    """Path of a patch operation with list indexes replaced, e.g. /events/*/player"""
+    return re.sub(r"/\d+(?=/|$)", "/*", path)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Convert archived raw payloads again, in parallel")
+    parser.add_argument("archive", help="Season archive with the raw payloads")
+    parser.add_argument("--database", help="Game archive (SQLite) to write the converted games to")
+    parser.add_argument("--output-dir", help="Directory to write one JSON file per converted game to")
+    parser.add_argument("--games", help="Comma-separated game IDs, defaults to every archived game")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of worker processes")
+    parser.add_argument("--chunk-size", type=int, default=25, help="Games converted and written together")
+    parser.add_argument("--sample", type=int, default=20, help="Games checked for determinism and changes")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the sample")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.archive):
+        parser.error(f"No such archive: {args.archive}")
+    archive = SeasonArchive(args.archive)
+    game_ids = [int(game_id) for game_id in args.games.split(",")] if args.games else archive.game_ids()
+    sample = set(random.Random(args.seed).sample(game_ids, min(args.sample, len(game_ids))))
+
+    # The earlier output of the sample, read before it is overwritten
+    old_outputs = {}
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+        for game_id in sample:
+            old_outputs[game_id] = _read_json(_json_path(args.output_dir, game_id))
+
+    database = GameArchive(args.database) if args.database else None
+    chunks = [game_ids[start:start + args.chunk_size] for start in range(0, len(game_ids), args.chunk_size)]
+    sampled: Dict[int, Dict[str, Any]] = {}
+    converted_count, missing, errors = 0, [], {}
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(args.archive,)) as pool:
+        futures = [pool.submit(convert_chunk, chunk) for chunk in chunks]
+        for done, future in enumerate(as_completed(futures), 1):
+            converted, chunk_missing, chunk_errors = future.result()
+            missing.extend(chunk_missing)
+            errors.update(chunk_errors)
+            if database is not None:
+                database.add_games(converted.values())
+            if args.output_dir:
+                for game_id, game in converted.items():
+                    _write_json(_json_path(args.output_dir, game_id), game)
+            sampled.update({game_id: game for game_id, game in converted.items() if game_id in sample})
+            converted_count += len(converted)
+            print(f"\r{done}/{len(chunks)} chunks, {converted_count} games", end="", file=sys.stderr)
+    elapsed = time.perf_counter() - started
+    print(file=sys.stderr)
+    if database is not None:
+        database.close()
+
+    print(f"Converted {converted_count} games in {elapsed:.1f} s with {args.workers} workers "
+          f"({converted_count / elapsed if elapsed else 0:.0f} games/s)")
+    if missing:
+        print(f"Skipped {len(missing)} games with missing payloads: {', '.join(map(str, sorted(missing)))}")
+    for game_id, error in sorted(errors.items()):
+        print(f"Error converting game {game_id}: {error}")
+
+    # Determinism: a second conversion in this process must give the same output
+    converter = SwehockeyAPI()
+    nondeterministic = [game_id for game_id, game in sampled.items()
+                        if convert_game(archive, converter, game_id) != game]
+    archive.close()
+    print(f"Determinism check: {len(sampled) - len(nondeterministic)} of {len(sampled)} sampled games identical")
+    for game_id in nondeterministic:
+        print(f"  game {game_id} converted differently twice")
+
+    # Changes of the conversion logic, compared with the earlier output
+    compared = {game_id: old for game_id, old in old_outputs.items() if old is not None and game_id in sampled}
+    if compared:
+        changed_paths = Counter()
+        changed_games = 0
+        for game_id, old in compared.items():
+            patch = make_patch(old, sampled[game_id])
+            if patch:
+                changed_games += 1
+                changed_paths.update({_general_path(operation["path"]) for operation in patch})
+        print(f"Compared with the earlier output: {changed_games} of {len(compared)} sampled games changed")
+        for path, count in changed_paths.most_common(10):
+            print(f"  {path}: {count} games")
+
+    return 1 if nondeterministic or errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
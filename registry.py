@@ -0,0 +1,244 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from swehockey import SwehockeyAPI
+
+
+# (operation, event) where operation is "added", "changed" or "removed"
+EventChange = Tuple[str, Dict[str, Any]]
+
+
+class GameEntry:
+    """
+    State of one loaded game.
+    Holds the game's own API client, the latest converted data and a lock that
+    serializes fetches of this game without blocking other games.
+    """
+
+    def __init__(self, game_id: int, api: SwehockeyAPI):
+        """
+        Initialize a game entry.
+
+        Args:
+            game_id: ID of the game
+            api: API client dedicated to this game
+        """
+        self.game_id = game_id
+        self.api = api
+        self.lock = threading.RLock()
+        self.last_access = time.monotonic()
+        self._snapshot: Tuple[int, Optional[Dict]] = (0, None)
+
+    @property
+    def data(self) -> Optional[Dict]:
+        """Latest converted game data"""
+        return self._snapshot[1]
+
+    @property
+    def version(self) -> int:
+        """Snapshot version of the latest converted game data"""
+        return self._snapshot[0]
+
+    def snapshot(self) -> Tuple[int, Optional[Dict]]:
+        """Get the version and converted data together, consistent with each other"""
+        return self._snapshot
+
+    def set_data(self, data: Dict) -> None:
+        """
+        Publish converted data together with the client's snapshot version.
+
+        The client's current data is published instead of data that a later
+        refresh has already replaced, so the snapshot never goes back to older
+        data under a newer version. Stale data (served because a refresh failed)
+        is published as given.
+        """
+        version, current = self.api.get_snapshot()
+        if current is not None and data is not current and not data.get("stale"):
+            data = current
+        self._snapshot = (version, data)
+
+
+class GameRegistry:
+    """
+    Thread-safe registry of loaded games keyed by game ID.
+    Lets one server process serve many operators and arenas at the same time.
+    Games not accessed for idle_timeout seconds, and the least recently used
+    games beyond max_games, are unloaded when another game is loaded.
+    """
+
+    REFRESH_METHODS = {
+        "summary": "refresh_summary",
+        "lineups": "refresh_lineups",
+        "actions": "refresh_actions",
+        "all": "refresh_all"
+    }
+
+    def __init__(self, api_factory: Callable[[], SwehockeyAPI] = SwehockeyAPI, max_games: int = 256,
+                 idle_timeout: float = 6 * 3600):
+        """
+        Initialize the registry.
+
+        Args:
+            api_factory: Creates the API client for a newly loaded game
+            max_games: Maximum number of games kept loaded
+            idle_timeout: Seconds after the last access a game may be unloaded
+        """
+        self.api_factory = api_factory
+        self.max_games = max_games
+        self.idle_timeout = idle_timeout
+        self._entries: Dict[int, GameEntry] = {}
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[GameEntry, List[EventChange]], None]] = []
+
+    def add_listener(self, listener: Callable[[GameEntry, List[EventChange]], None]) -> None:
+        """
+        Register a function called with the event changes found by each refresh.
+
+        Listeners run once per refresh, while the game's lock is held, so they
+        see the changes of one game in order.
+        """
+        self._listeners.append(listener)
+
+    def _entry(self, game_id: int) -> GameEntry:
+        """Get or create the entry of a game"""
+        with self._lock:
+            entry = self._entries.get(game_id)
+            if entry is None:
+                self._evict(self.max_games - 1)
+                entry = GameEntry(game_id, self.api_factory())
+                self._entries[game_id] = entry
+            return entry
+
+    def _evict(self, keep: int) -> None:
+        """
+        Unload idle games, then the least recently used ones until at most keep
+        entries are left. Must be called with the registry lock held; games
+        still loading are never unloaded.
+        """
+        now = time.monotonic()
+        loaded = sorted((entry for entry in self._entries.values() if entry.data is not None),
+                        key=lambda entry: entry.last_access)
+        for entry in loaded:
+            if len(self._entries) <= keep and now - entry.last_access <= self.idle_timeout:
+                break
+            del self._entries[entry.game_id]
+
+    def get(self, game_id: int) -> Optional[GameEntry]:
+        """
+        Get a game that has already been loaded.
+
+        Args:
+            game_id: ID of the game
+
+        Returns:
+            GameEntry: The loaded game, or None if it is not loaded
+        """
+        entry = self._entries.get(game_id)
+        if entry is None or entry.data is None:
+            return None
+        entry.last_access = time.monotonic()
+        return entry
+
+    def load(self, game_id: int) -> GameEntry:
+        """
+        Get a game, fetching it from the API only if it is not loaded yet.
+
+        Args:
+            game_id: ID of the game
+
+        Returns:
+            GameEntry: The loaded game
+        """
+        while True:
+            entry = self._entry(game_id)
+            with entry.lock:
+                if self._entries.get(game_id) is not entry:
+                    continue  # A failed load dropped the entry while this thread waited
+                if entry.data is None:
+                    try:
+                        entry.set_data(entry.api.load_game(game_id))
+                    except Exception:
+                        # Do not keep an empty entry for a game that may not exist
+                        self.unload(game_id)
+                        raise
+            entry.last_access = time.monotonic()
+            return entry
+
+    def refresh(self, game_id: int, refresh_type: str) -> GameEntry:
+        """
+        Refresh part of a loaded game.
+
+        Args:
+            game_id: ID of the game
+            refresh_type: "summary", "lineups", "actions" or "all"
+
+        Returns:
+            GameEntry: The refreshed game
+
+        Raises:
+            ValueError: If the refresh type is unknown
+        """
+        method = self.REFRESH_METHODS.get(refresh_type)
+        if method is None:
+            raise ValueError(f"Invalid refresh type: {refresh_type}")
+
+        entry = self.load(game_id)
+        with entry.lock:
+            cursor = entry.api.get_event_cursor()
+            entry.set_data(getattr(entry.api, method)())
+            changes = entry.api.event_changes_since(cursor)
+            if changes:
+                for listener in self._listeners:
+                    listener(entry, changes)
+        return entry
+
+    def export_state(self) -> Dict[int, Dict[str, Any]]:
+        """
+        Get the client state of every loaded game.
+
+        Returns:
+            dict: States from SwehockeyAPI.export_state keyed by game ID
+        """
+        with self._lock:
+            entries = list(self._entries.values())
+        states = {}
+        for entry in entries:
+            with entry.lock:
+                if entry.data is not None:
+                    states[entry.game_id] = entry.api.export_state()
+        return states
+
+    def import_state(self, states: Dict[int, Dict[str, Any]]) -> List[int]:
+        """
+        Restore games from export_state, skipping games that are already loaded.
+
+        Args:
+            states: Client states keyed by game ID
+
+        Returns:
+            List of the restored game IDs
+        """
+        restored = []
+        for game_id, state in states.items():
+            entry = self._entry(game_id)
+            with entry.lock:
+                if entry.data is not None:
+                    continue
+                entry.api.import_state(state)
+                data = entry.api.get_current_data()
+                if data is not None:
+                    entry.set_data(data)
+                    restored.append(game_id)
+        return restored
+
+    def unload(self, game_id: int) -> None:
+        """Forget a loaded game"""
+        with self._lock:
+            self._entries.pop(game_id, None)
+
+    def games(self) -> List[GameEntry]:
+        """Get all loaded games, most recently used first"""
+        with self._lock:
+            entries = [entry for entry in self._entries.values() if entry.data is not None]
+        return sorted(entries, key=lambda entry: entry.last_access, reverse=True)
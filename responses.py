@@ -0,0 +1,102 @@
+import gzip
+import json
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any, Callable, Hashable, Optional
+
+from metrics import metrics
+
+try:
+    import brotli
+except ImportError:  # Optional, gzip is used when brotli is not installed
+    brotli = None
+
+
+def choose_encoding(accept_encoding) -> Optional[str]:
+    """
+    Pick the best supported content encoding for a request.
+
+    Args:
+        accept_encoding: The request's parsed Accept-Encoding header
+
+    Returns:
+        str: "br", "gzip" or None for an uncompressed response
+    """
+    if brotli is not None and accept_encoding["br"]:
+        return "br"
+    if accept_encoding["gzip"]:
+        return "gzip"
+    return None
+
+
+def _json_default(value: Any) -> Any:
+    """Serialize mappings that are not dicts, such as lazily converted games"""
+    if isinstance(value, Mapping):
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_json(payload: Any, encoding: Optional[str]) -> bytes:
+    """
+    Serialize a payload to compact JSON and compress it.
+
+    Args:
+        payload: JSON-serializable data
+        encoding: "br", "gzip" or None
+
+    Returns:
+        bytes: Response body
+    """
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=_json_default).encode("utf-8")
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6)
+    return body
+
+
+class EncodedBodyCache:
+    """
+    Small LRU cache of serialized and compressed response bodies.
+
+    Bodies are keyed by snapshot version, so polling clients that receive a
+    full response share one serialization and compression per version.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of bodies kept
+        """
+        self.max_entries = max_entries
+        self._bodies = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, build: Callable[[], bytes]) -> bytes:
+        """
+        Get a cached body or build and cache it.
+
+        Args:
+            key: Identifies the body, including snapshot version and encoding
+            build: Creates the body on a cache miss
+
+        Returns:
+            bytes: Response body
+        """
+        with self._lock:
+            body = self._bodies.get(key)
+            if body is not None:
+                self._bodies.move_to_end(key)
+                metrics.incr("api.body_cache.hits")
+                return body
+
+        metrics.incr("api.body_cache.misses")
+        body = build()
+        with self._lock:
+            self._bodies[key] = body
+            while len(self._bodies) > self.max_entries:
+                self._bodies.popitem(last=False)
+        return body
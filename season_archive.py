@@ -0,0 +1,390 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from bisect import bisect_right
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows, appends are then only safe within one process
+    fcntl = None
+
+# Index record: game ID, endpoint, fetch time, offset, compressed length,
+# uncompressed length, CRC-32 of the uncompressed payload, dictionary ID
+INDEX_RECORD = struct.Struct("<qBdQIIII")
+
+# zlib uses at most the last 32 KiB of a preset dictionary
+MAX_DICTIONARY_SIZE = 32 * 1024
+
+
+def _serialize(payload: Dict) -> bytes:
+    """Compact JSON bytes of a raw API payload"""
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _content_crc(payload: Dict) -> int:
+    """CRC-32 of a payload without its fetch "Timestamp", which changes on every Actions poll"""
+    return zlib.crc32(_serialize({key: value for key, value in payload.items() if key != "Timestamp"}))
+
+
+def train_dictionary(samples: Iterable[Dict], size: int = MAX_DICTIONARY_SIZE) -> bytes:
+    """
+    Build a shared compression dictionary from sample payloads.
+
+    The payloads are split into JSON fragments (keys with their values, such as
+    '"EventTypeId":4' or '"Name":"Utvisningsminuter"'); fragments found in
+    several samples are kept, the most valuable ones last, where zlib finds
+    them at the shortest distance.
+
+    Args:
+        samples: Raw LineUps, Summary and Actions payloads
+        size: Maximum dictionary size in bytes
+
+    Returns:
+        bytes: Dictionary for SeasonArchive
+    """
+    counts = Counter()
+    sample_count = 0
+    for sample in samples:
+        sample_count += 1
+        fragments = set(_serialize(sample).replace(b"{", b",").replace(b"[", b",").split(b","))
+        counts.update(fragment for fragment in fragments if 3 <= len(fragment) <= 256)
+
+    minimum = 2 if sample_count > 1 else 1
+    useful = [(count * len(fragment), fragment) for fragment, count in counts.items() if count >= minimum]
+    useful.sort(reverse=True)
+
+    chosen = []
+    total = 0
+    for _, fragment in useful:
+        if total + len(fragment) + 1 > min(size, MAX_DICTIONARY_SIZE):
+            continue
+        chosen.append(fragment)
+        total += len(fragment) + 1
+    return b",".join(reversed(chosen))
+
+
+class SeasonArchive:
+    """
+    Append-only archive of raw API payloads for a season.
+
+    Each payload is compressed on its own with zlib and a shared preset
+    dictionary, then appended to the data file. A fixed-size record per payload
+    is appended to an index file next to it, keyed by game ID, endpoint and
+    fetch time. Reads memory-map the data file, so one snapshot is decompressed
+    without reading the rest of the archive. Unchanged payloads, also those
+    differing only in their fetch timestamp, are not stored again.
+
+    An archive created without a dictionary can train one from its first
+    payloads (see train_after). Those payloads stay compressed without a
+    dictionary, and the dictionary only knows the fragments of the games
+    stored up to then.
+
+    Files: <path> (payloads), <path>.idx (index), <path>.dict (dictionary).
+    """
+
+    ENDPOINTS = ("LineUps", "Summary", "Actions")
+
+    def __init__(self, path: str, dictionary: Optional[bytes] = None, train_after: int = 0):
+        """
+        Open or create an archive.
+
+        Args:
+            path: Path of the data file
+            dictionary: Compression dictionary (see train_dictionary) for a new
+                        archive; an existing archive keeps its own
+            train_after: Without a dictionary, train one from the stored payloads
+                         once this many are stored and compress later payloads
+                         with it (0 never trains)
+        """
+        self.path = path
+        self.index_path = path + ".idx"
+        self.dictionary_path = path + ".dict"
+        self.train_after = train_after
+
+        self.dictionary = b""
+        self.dictionary_id = 0
+        if not self._load_dictionary() and dictionary:
+            self._save_dictionary(dictionary)
+
+        for file_path in (self.path, self.index_path):
+            open(file_path, "ab").close()
+        self._data = open(self.path, "ab")
+        self._index = open(self.index_path, "ab")
+        self._reader = open(self.path, "rb")
+        self._map = None
+
+        # (game ID, endpoint) -> records sorted by fetch time
+        self._records: Dict[Tuple[int, str], List[tuple]] = {}
+        self._index_position = 0
+        # (game ID, endpoint) -> (latest record, its _content_crc)
+        self._content_crcs: Dict[Tuple[int, str], Tuple[tuple, int]] = {}
+        self._lock = threading.RLock()
+        self._load_index()
+
+    def close(self) -> None:
+        """Close the archive files"""
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._data.close()
+            self._index.close()
+            self._reader.close()
+
+    def _load_dictionary(self) -> bool:
+        """Use the dictionary file, also one trained by another process; False if there is none"""
+        try:
+            with open(self.dictionary_path, "rb") as f:
+                dictionary = f.read()
+        except FileNotFoundError:
+            return False
+        if not dictionary:
+            return False
+        self.dictionary = dictionary
+        self.dictionary_id = zlib.crc32(dictionary)
+        return True
+
+    def _save_dictionary(self, dictionary: bytes) -> None:
+        with open(self.dictionary_path + ".tmp", "wb") as f:
+            f.write(dictionary)
+        os.replace(self.dictionary_path + ".tmp", self.dictionary_path)
+        self.dictionary = dictionary
+        self.dictionary_id = zlib.crc32(dictionary)
+
+    def _train_if_due(self) -> None:
+        """Train and save the dictionary once train_after payloads are stored without one"""
+        with self._lock:
+            if fcntl is not None:
+                fcntl.flock(self._index.fileno(), fcntl.LOCK_EX)
+            try:
+                if self._load_dictionary():
+                    return
+                self._load_index()
+                records = [record for records in self._records.values() for record in records]
+                if len(records) < self.train_after:
+                    return
+                dictionary = train_dictionary(self._decompress(record) for record in records)
+                if dictionary:
+                    self._save_dictionary(dictionary)
+                else:
+                    self.train_after = 0  # Nothing worth sharing, keep compressing without one
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._index.fileno(), fcntl.LOCK_UN)
+
+    def _load_index(self) -> None:
+        """Read index records appended since the last call, also by other processes"""
+        with open(self.index_path, "rb") as f:
+            f.seek(self._index_position)
+            data = f.read()
+        data_size = os.path.getsize(self.path)
+
+        usable = len(data) - len(data) % INDEX_RECORD.size
+        for position in range(0, usable, INDEX_RECORD.size):
+            record = INDEX_RECORD.unpack_from(data, position)
+            game_id, endpoint_code, fetched_at, offset, length = record[:5]
+            if offset + length > data_size:
+                break  # The payload of this record was not completely written
+            key = (game_id, self.ENDPOINTS[endpoint_code])
+            records = self._records.setdefault(key, [])
+            records.append((fetched_at,) + record[3:])
+            if len(records) > 1 and records[-2][0] > fetched_at:
+                records.sort(key=lambda item: item[0])
+            self._index_position += INDEX_RECORD.size
+
+    def append(self, game_id: int, endpoint: str, payload: Dict, fetched_at: Optional[float] = None) -> bool:
+        """
+        Store a fetched payload, unless it equals the latest stored one.
+
+        Args:
+            game_id: ID of the game
+            endpoint: "LineUps", "Summary" or "Actions"
+            payload: Raw API response
+            fetched_at: Fetch time as a Unix timestamp, defaults to now
+
+        Returns:
+            bool: True if the payload was stored
+        """
+        raw = _serialize(payload)
+        crc = zlib.crc32(raw)
+        content_crc = _content_crc(payload)
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        endpoint_code = self.ENDPOINTS.index(endpoint)
+
+        if not self.dictionary and self.train_after:
+            self._train_if_due()
+        dictionary, dictionary_id = self.dictionary, self.dictionary_id
+        compressor = zlib.compressobj(9, zdict=dictionary) if dictionary else zlib.compressobj(9)
+        compressed = compressor.compress(raw) + compressor.flush()
+
+        with self._lock:
+            if fcntl is not None:
+                fcntl.flock(self._index.fileno(), fcntl.LOCK_EX)
+            try:
+                self._load_index()
+                latest = self._records.get((game_id, endpoint))
+                if latest and self._latest_content_crc((game_id, endpoint), latest[-1]) == content_crc:
+                    return False
+
+                # Data first, index second: a crash leaves unused bytes, never a broken record
+                offset = os.fstat(self._data.fileno()).st_size
+                self._data.write(compressed)
+                self._data.flush()
+                record = INDEX_RECORD.pack(game_id, endpoint_code, fetched_at, offset, len(compressed),
+                                           len(raw), crc, dictionary_id)
+                self._index.write(record)
+                self._index.flush()
+                self._load_index()
+                return True
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._index.fileno(), fcntl.LOCK_UN)
+
+    def _latest_content_crc(self, key: Tuple[int, str], record: tuple) -> Optional[int]:
+        """_content_crc of a stored payload, remembered for the latest record of each endpoint"""
+        cached = self._content_crcs.get(key)
+        if cached is not None and cached[0] == record:
+            return cached[1]
+        try:
+            content_crc = _content_crc(self._decompress(record))
+        except ValueError:
+            return None  # Unreadable, store the new payload
+        self._content_crcs[key] = (record, content_crc)
+        return content_crc
+
+    def _view(self, offset: int, length: int) -> memoryview:
+        """Memory-mapped bytes of one payload, remapping when the file has grown"""
+        if self._map is None or offset + length > len(self._map):
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(self._reader.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(self._map)[offset:offset + length]
+
+    def _decompress(self, record: tuple) -> Dict:
+        """Decompress and parse one stored payload"""
+        _, offset, length, raw_length, crc, dictionary_id = record
+        if dictionary_id and dictionary_id != self.dictionary_id:
+            # Trained by another process since this one opened the archive
+            self._load_dictionary()
+        if dictionary_id and dictionary_id != self.dictionary_id:
+            raise ValueError(f"Payload at offset {offset} was compressed with another dictionary")
+
+        with self._lock:
+            view = self._view(offset, length)
+            try:
+                decompressor = zlib.decompressobj(zdict=self.dictionary) if dictionary_id else zlib.decompressobj()
+                raw = decompressor.decompress(view) + decompressor.flush()
+            finally:
+                view.release()
+
+        if len(raw) != raw_length or zlib.crc32(raw) != crc:
+            raise ValueError(f"Corrupt payload at offset {offset}")
+        return json.loads(raw)
+
+    def _find(self, game_id: int, endpoint: str, at: Optional[float]) -> Optional[tuple]:
+        """Index record of the latest fetch at or before a time"""
+        with self._lock:
+            records = self._records.get((game_id, endpoint))
+            if not records:
+                self._load_index()
+                records = self._records.get((game_id, endpoint))
+            if not records:
+                return None
+            if at is None:
+                return records[-1]
+            position = bisect_right([record[0] for record in records], at)
+            return records[position - 1] if position else None
+
+    def get(self, game_id: int, endpoint: str, at: Optional[float] = None) -> Optional[Dict]:
+        """
+        Get a stored payload.
+
+        Args:
+            game_id: ID of the game
+            endpoint: "LineUps", "Summary" or "Actions"
+            at: Unix timestamp; the latest payload fetched at or before it is
+                returned (defaults to the latest payload)
+
+        Returns:
+            dict: The raw API response, or None if nothing was stored
+        """
+        record = self._find(game_id, endpoint, at)
+        return self._decompress(record) if record is not None else None
+
+    def snapshot(self, game_id: int, at: Optional[float] = None) -> Optional[Dict[str, Dict]]:
+        """
+        Get the payloads of all endpoints of a game as they were at a time.
+
+        Args:
+            game_id: ID of the game
+            at: Unix timestamp, defaults to the latest payloads
+
+        Returns:
+            dict: Payloads keyed by endpoint, or None if an endpoint is missing
+        """
+        payloads = {}
+        for endpoint in self.ENDPOINTS:
+            payload = self.get(game_id, endpoint, at)
+            if payload is None:
+                return None
+            payloads[endpoint] = payload
+        return payloads
+
+    def fetch_times(self, game_id: int, endpoint: str) -> List[float]:
+        """Get the fetch times of the stored payloads of a game's endpoint"""
+        with self._lock:
+            return [record[0] for record in self._records.get((game_id, endpoint), [])]
+
+    def game_ids(self) -> List[int]:
+        """Get the IDs of all games with stored payloads"""
+        with self._lock:
+            self._load_index()
+            return sorted({game_id for game_id, _ in self._records})
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the size of the archive.
+
+        Returns:
+            dict: Number of payloads and their compressed and uncompressed bytes
+        """
+        with self._lock:
+            records = [record for records in self._records.values() for record in records]
+        compressed = sum(record[2] for record in records)
+        raw = sum(record[3] for record in records)
+        return {
+            "payloads": len(records),
+            "compressedBytes": compressed,
+            "rawBytes": raw,
+            "ratio": round(raw / compressed, 2) if compressed else None
+        }
+
+
+if __name__ == '__main__':
+    import sys
+    from swehockey import SwehockeyAPI
+
+    if len(sys.argv) < 3:
+        print("Usage: python season_archive.py <archive> <game_id> [<game_id> ...]")
+        print("A new archive trains its dictionary on the given games.")
+        sys.exit(1)
+
+    api = SwehockeyAPI()
+    fetched = {int(game_id): {endpoint: api._make_request(endpoint, int(game_id)) for endpoint in SeasonArchive.ENDPOINTS}
+               for game_id in sys.argv[2:]}
+    dictionary = None
+    if not os.path.exists(sys.argv[1] + ".dict"):
+        dictionary = train_dictionary(payload for payloads in fetched.values() for payload in payloads.values())
+
+    archive = SeasonArchive(sys.argv[1], dictionary)
+    for game_id, payloads in fetched.items():
+        for endpoint, payload in payloads.items():
+            archive.append(game_id, endpoint, payload)
+    print(json.dumps(archive.stats()))
+    archive.close()
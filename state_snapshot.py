@@ -0,0 +1,155 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows, saves are then only safe within one process
+    fcntl = None
+
+from metrics import metrics
+from registry import GameRegistry
+
+
+class StateSnapshotter:
+    """
+    Periodically saves the loaded games to a local file and restores them at startup.
+
+    A restarted process then serves the last known state of its games at once
+    and continues refreshing them from the saved payloads and logs, instead of
+    fetching and converting every game again under the rate limit. Restored
+    clients get a new epoch, so versions and cursors handed out before the
+    restart (or by another worker restoring the same file) get a reset once.
+
+    The file is JSON of the registry's client states, written atomically.
+    Several processes can share it: each one updates the games it has loaded
+    and keeps the games saved by the others, under an exclusive lock on a
+    sidecar file (<path>.lock) so no save drops another's games.
+    """
+
+    FORMAT_VERSION = 2
+
+    def __init__(self, registry: GameRegistry, path: str, interval: float = 10.0, max_age: float = 6 * 3600):
+        """
+        Initialize the snapshotter.
+
+        Args:
+            registry: Registry whose games are saved and restored
+            path: Path of the snapshot file
+            interval: Seconds between snapshots
+            max_age: Games saved longer ago than this many seconds are not restored
+        """
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self.max_age = max_age
+        self._saved_versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def _read(self) -> Dict[int, Dict[str, Any]]:
+        """Read the saved games that are young enough, ignoring a missing or unreadable file"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"Ignoring unreadable state snapshot {self.path}: {e}")
+            return {}
+
+        if not isinstance(snapshot, dict) or snapshot.get("format") != self.FORMAT_VERSION:
+            return {}
+        oldest = time.time() - self.max_age
+        # JSON object keys are strings, game IDs are integers
+        return {int(game_id): game for game_id, game in snapshot["games"].items() if game["saved_at"] >= oldest}
+
+    def save(self, force: bool = False) -> bool:
+        """
+        Save the loaded games if any of them changed since the last save.
+
+        Args:
+            force: Save even if nothing changed
+
+        Returns:
+            bool: True if the file was written
+        """
+        with self._lock:
+            states = self.registry.export_state()
+            versions = {game_id: state["version"] for game_id, state in states.items()}
+            if not force and versions == self._saved_versions:
+                return False
+
+            started = time.perf_counter()
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            with open(self.path + ".lock", "a") as lock_file:
+                # Other workers read, merge and replace the same file
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                now = time.time()
+                games = self._read()
+                for game_id, state in states.items():
+                    games[game_id] = {"saved_at": now, "state": state}
+
+                fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".state-", suffix=".tmp")
+                try:
+                    with os.fdopen(fd, "w", encoding="utf-8") as f:
+                        json.dump({"format": self.FORMAT_VERSION, "games": games}, f, separators=(",", ":"))
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(temp_path, self.path)
+                except BaseException:
+                    os.unlink(temp_path)
+                    raise
+
+            self._saved_versions = versions
+            metrics.incr("snapshot.saves")
+            metrics.set("snapshot.save_seconds", time.perf_counter() - started)
+            metrics.set("snapshot.games", len(games))
+            return True
+
+    def restore(self, game_ids: Optional[List[int]] = None) -> List[int]:
+        """
+        Restore saved games into the registry.
+
+        Args:
+            game_ids: Games to restore, defaults to every saved game
+
+        Returns:
+            List of the restored game IDs
+        """
+        started = time.perf_counter()
+        games = self._read()
+        states = {game_id: game["state"] for game_id, game in games.items()
+                  if game_ids is None or game_id in game_ids}
+        restored = self.registry.import_state(states)
+        with self._lock:
+            self._saved_versions.update({game_id: states[game_id]["version"] for game_id in restored})
+        metrics.incr("snapshot.restored_games", len(restored))
+        metrics.set("snapshot.restore_seconds", time.perf_counter() - started)
+        return restored
+
+    def start(self) -> None:
+        """Start saving periodically in a background thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="state-snapshot", daemon=True)
+            self._thread.start()
+
+    def stop(self, save: bool = True) -> None:
+        """Stop the background thread, saving a last snapshot"""
+        self._stopped.set()
+        if save:
+            self.save()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                self.save()
+            except Exception as e:
+                metrics.incr("snapshot.errors")
+                print(f"Error saving state snapshot: {e}")
@@ -0,0 +1,175 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+
+class SharedStore:
+    """
+    Small key-value store in a local SQLite file.
+
+    Lets the worker processes of one server (e.g. gunicorn workers) share state
+    such as the session secret, recently fetched upstream payloads and the games
+    being watched. Values are stored as JSON and may expire.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the store, creating the database file if needed.
+
+        Args:
+            path: Path of the SQLite database file
+        """
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS kv ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " updated REAL NOT NULL,"
+                " expires REAL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection (SQLite connections are not shared between threads)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str, default: Any = None, max_age: Optional[float] = None) -> Any:
+        """
+        Get a value.
+
+        Args:
+            key: Key of the value
+            default: Returned if the key is missing, expired or too old
+            max_age: Ignore values written more than this many seconds ago
+
+        Returns:
+            The stored value or the default
+        """
+        row = self._connection().execute(
+            "SELECT value, updated, expires FROM kv WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return default
+
+        value, updated, expires = row
+        now = time.time()
+        if expires is not None and expires <= now:
+            return default
+        if max_age is not None and now - updated > max_age:
+            return default
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a value.
+
+        Args:
+            key: Key of the value
+            value: JSON-serializable value
+            ttl: Seconds until the value expires, None to keep it
+        """
+        now = time.time()
+        expires = now + ttl if ttl is not None else None
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, updated, expires) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, separators=(",", ":")), now, expires)
+            )
+
+    def get_or_create(self, key: str, create: Callable[[], Any]) -> Any:
+        """
+        Get a value, storing a newly created one if the key is missing.
+        Concurrent processes all end up with the value of the first writer.
+
+        Args:
+            key: Key of the value
+            create: Creates the value if it is missing
+
+        Returns:
+            The stored value
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO kv (key, value, updated, expires) VALUES (?, ?, ?, NULL)",
+                (key, json.dumps(create()), time.time())
+            )
+        return self.get(key)
+
+    def update(self, key: str, change: Callable[[Any], Any], ttl: Optional[float] = None) -> Any:
+        """
+        Replace a value with one computed from it, atomically across processes.
+
+        Args:
+            key: Key of the value
+            change: Gets the current value (None if missing or expired) and returns the new one
+            ttl: Seconds until the new value expires, None to keep it
+
+        Returns:
+            The new value
+        """
+        conn = self._connection()
+        with conn:
+            # Take the write lock before reading, so no other process changes the value in between
+            conn.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            row = conn.execute("SELECT value, expires FROM kv WHERE key = ?", (key,)).fetchone()
+            current = None
+            if row is not None and (row[1] is None or row[1] > now):
+                current = json.loads(row[0])
+            value = change(current)
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, updated, expires) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, separators=(",", ":")), now, now + ttl if ttl is not None else None)
+            )
+        return value
+
+    def delete(self, key: str) -> None:
+        """Remove a value"""
+        with self._connection() as conn:
+            conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    def items(self, prefix: str) -> List[Tuple[str, Any]]:
+        """
+        Get all unexpired values whose key starts with a prefix.
+
+        Args:
+            prefix: Key prefix (e.g., "hot_game:")
+
+        Returns:
+            List of (key, value) tuples, most recently written first
+        """
+        rows = self._connection().execute(
+            "SELECT key, value FROM kv WHERE key >= ? AND key < ?"
+            " AND (expires IS NULL OR expires > ?) ORDER BY updated DESC",
+            (prefix, prefix + "￿", time.time())
+        ).fetchall()
+        return [(key, json.loads(value)) for key, value in rows]
+
+    def purge_expired(self) -> int:
+        """
+        Delete expired values.
+
+        Returns:
+            int: Number of values deleted
+        """
+        with self._connection() as conn:
+            cursor = conn.execute("DELETE FROM kv WHERE expires IS NOT NULL AND expires <= ?", (time.time(),))
+            return cursor.rowcount
@@ -1,8 +1,262 @@
 import json
+import os
+import random
 import re
+import threading
 import time
 import requests
-from typing import Dict, Union, List, Optional, Any
+from collections.abc import Mapping
+from typing import Dict, Union, List, Optional, Any, Iterator, Set, Tuple
+from json_patch import make_patch
+
+class SwehockeyAPIError(Exception):
+    """Raised when the Swedish Hockey API cannot be reached or returns an error."""
+    
+    def __init__(self, message: str, endpoint: Optional[str] = None, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.endpoint = endpoint
+        self.status_code = status_code
+
+
+class CircuitOpenError(SwehockeyAPIError):
+    """Raised without contacting the API while an endpoint's circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Stops calling an endpoint that keeps failing.
+    
+    After failure_threshold consecutive failures the circuit opens and calls fail
+    immediately. After reset_timeout seconds one trial call is let through; its
+    success closes the circuit, its failure opens it again.
+    """
+    
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Initialize a closed circuit breaker.
+        
+        Args:
+            failure_threshold (int): Consecutive failures that open the circuit
+            reset_timeout (float): Seconds before a trial call is allowed
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> str:
+        """Current state: closed, open or half-open"""
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+    
+    def allow(self) -> bool:
+        """Whether a call may be made now"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+    
+    def record_success(self) -> None:
+        """Close the circuit after a successful call"""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+    
+    def record_failure(self) -> None:
+        """Count a failed call, opening the circuit when the threshold is reached"""
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class _Flight:
+    """A fetch shared by concurrent callers (see SwehockeyAPI._single_flight)."""
+    
+    def __init__(self):
+        self.result = None
+        self.error = None
+        self.finished_at = None
+        self._done = threading.Event()
+    
+    def finish(self) -> None:
+        """Mark the fetch as done and wake up the waiting callers"""
+        self.finished_at = time.monotonic()
+        self._done.set()
+    
+    def is_fresh(self, window: float) -> bool:
+        """Whether a new caller may join this fetch instead of starting its own"""
+        if not self._done.is_set():
+            return True
+        return self.error is None and time.monotonic() - self.finished_at < window
+    
+    def wait(self) -> "LazyGame":
+        """Wait for the fetch and return its result or raise its exception"""
+        self._done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class LazyGame(Mapping):
+    """
+    Converted game data that converts each section on first access.
+    
+    Behaves like the converted dict (game["teams"], game.get("events"), iteration,
+    JSON via to_dict()), but a section is only converted from the raw payloads
+    when it is first read, and then memoized. A page that shows the lineups
+    never pays for converting the statistics or the events.
+    """
+    
+    # Raw payloads each section is converted from
+    SECTIONS = {
+        "game": ("lineups", "summary"),
+        "teams": ("lineups",),
+        "personnel": ("lineups",),
+        "roster": ("lineups",),
+        "statistics": ("summary",),
+        "events": ("lineups", "events"),  # The roster resolves the players of assists
+        "timestamp": ("events",)
+    }
+    
+    # Number of conversions per section across all games
+    _counters: Dict[str, int] = {}
+    _counters_lock = threading.Lock()
+    
+    def __init__(self, converter: "SwehockeyAPI", lineups_data: Dict, summary_data: Dict,
+                 events_data: Dict, values: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the game without converting anything.
+        
+        Args:
+            converter: Client providing the section converters
+            lineups_data: Lineups data
+            summary_data: Game summary/statistics data
+            events_data: Game events data
+            values: Already converted sections, and extra keys such as "stale"
+        """
+        self._converter = converter
+        self._sources = {"lineups": lineups_data, "summary": summary_data, "events": events_data}
+        self._values: Dict[str, Any] = dict(values or {})
+        self._lock = threading.RLock()
+        # Per section, a key that changes only when the section's payloads do
+        # (client epoch, game ID, version); set by the client, used to cache rendered fragments
+        self.section_keys: Dict[str, tuple] = {}
+    
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return self._values[key]
+        except KeyError:
+            if key not in self.SECTIONS:
+                raise
+        
+        with self._lock:
+            if key not in self._values:
+                self._values[key] = self._convert(key)
+                with self._counters_lock:
+                    self._counters[key] = self._counters.get(key, 0) + 1
+            return self._values[key]
+    
+    def __iter__(self) -> Iterator[str]:
+        yield from self.SECTIONS
+        yield from (key for key in list(self._values) if key not in self.SECTIONS)
+    
+    def __len__(self) -> int:
+        return len(self.SECTIONS) + sum(1 for key in list(self._values) if key not in self.SECTIONS)
+    
+    def _convert(self, section: str) -> Any:
+        """Convert one section from the raw payloads"""
+        converter = self._converter
+        lineups, summary, events = self._sources["lineups"], self._sources["summary"], self._sources["events"]
+        if section == "game":
+            return converter._convert_game(lineups, summary)
+        if section == "events":
+            return converter._convert_events(events, self["roster"])
+        if section == "statistics":
+            return converter._convert_statistics(summary)
+        if section == "timestamp":
+            return converter._convert_timestamp(events)
+        return getattr(converter, f"_convert_{section}")(lineups)
+    
+    @property
+    def materialized(self) -> Tuple[str, ...]:
+        """Sections of this game that have been converted so far"""
+        return tuple(section for section in self.SECTIONS if section in self._values)
+    
+    @classmethod
+    def counters(cls) -> Dict[str, int]:
+        """Number of conversions of each section across all games"""
+        with cls._counters_lock:
+            return dict(cls._counters)
+    
+    def update_timestamp(self, events_data: Dict) -> None:
+        """Take the fetch timestamp of a newer Actions payload that is otherwise unchanged"""
+        with self._lock:
+            self._sources["events"] = events_data
+            self._values.pop("timestamp", None)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert every section and return a plain dict"""
+        return {key: self[key] for key in self}
+    
+    def with_values(self, **values: Any) -> "LazyGame":
+        """
+        Copy of the game with extra keys, sharing the sections converted so far.
+        
+        Returns:
+            LazyGame: The copy
+        """
+        with self._lock:
+            game = LazyGame(self._converter, self._sources["lineups"], self._sources["summary"],
+                            self._sources["events"], {**self._values, **values})
+        game.section_keys = self.section_keys
+        return game
+    
+    def updated(self, lineups_data: Dict, summary_data: Dict, events_data: Dict) -> Tuple["LazyGame", Set[str]]:
+        """
+        Game over newly fetched payloads, keeping the sections whose payloads did not change.
+        
+        Args:
+            lineups_data: Lineups data
+            summary_data: Game summary/statistics data
+            events_data: Game events data
+            
+        Returns:
+            tuple: The new game and the names of the payloads that changed
+                   ("lineups", "summary", "events"); the fetch timestamp alone is
+                   not a change
+        """
+        sources = {"lineups": lineups_data, "summary": summary_data, "events": events_data}
+        changed = set()
+        for name, data in sources.items():
+            old = self._sources[name]
+            if data is old:
+                continue
+            if name == "events":
+                data, old = SwehockeyAPI._without_timestamp(data), SwehockeyAPI._without_timestamp(old)
+            if data != old:
+                changed.add(name)
+        
+        with self._lock:
+            values = {
+                section: value for section, value in self._values.items()
+                if section in self.SECTIONS and section != "timestamp"
+                and not changed.intersection(self.SECTIONS[section])
+            }
+        return LazyGame(self._converter, lineups_data, summary_data, events_data, values), changed
+
 
 class SwehockeyAPI:
     """
@@ -10,30 +264,100 @@ class SwehockeyAPI:
     Provides functions to fetch and convert hockey game data into a standardized format.
     """
     
-    BASE_URL = "https://backend-app.swehockey.se/GameTicker/"
+    BASE_URL = os.getenv("SWEHOCKEY_BASE_URL", "https://backend-app.swehockey.se/GameTicker/")
     HEADERS = {
         "X-Backendversion": "2",
         "X-Useridentity": "_",
     }
     
-    def __init__(self, rate_limit_delay: float = 0.5):
+    # Maximum number of entries kept in the event change log
+    EVENT_LOG_SIZE = 1000
+    # Maximum number of versions kept in the patch log
+    PATCH_LOG_SIZE = 200
+    
+    # (connect, read) timeouts of one request in seconds
+    TIMEOUT = (3.05, 10.0)
+    # Retries after a failed request, with jittered exponential backoff
+    MAX_RETRIES = 2
+    BACKOFF_BASE = 0.5
+    BACKOFF_MAX = 4.0
+    # Status codes worth retrying; other errors are returned by the API on every attempt
+    RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+    # Request exceptions worth retrying; others (invalid URL, redirect loops) would fail again
+    RETRY_EXCEPTIONS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+    # Upper bound in seconds on one call including all retries
+    MAX_CALL_TIME = 15.0
+    
+    # Circuit breakers per endpoint, shared by all clients since they call the same upstream
+    _breakers: Dict[str, CircuitBreaker] = {}
+    _breakers_lock = threading.Lock()
+    
+    def __init__(self, rate_limit_delay: float = 0.5, coalesce_window: float = 1.0,
+                 shared_cache: Optional[Any] = None, recorder: Optional[Any] = None):
         """
         Initialize the SwehockeyAPI client.
         
         Args:
             rate_limit_delay (float): Delay between API requests in seconds to avoid rate limiting
+            coalesce_window (float): Seconds a finished fetch keeps answering identical calls
+            shared_cache: Optional store shared between processes (see store.SharedStore);
+                          responses younger than coalesce_window are reused from it
+            recorder: Optional archive receiving every response fetched from the API
+                      (see season_archive.SeasonArchive)
         """
         self.rate_limit_delay = rate_limit_delay
+        self.coalesce_window = coalesce_window
+        self.shared_cache = shared_cache
+        self.recorder = recorder
+        # Serve the last good data, marked as stale, when a refresh fails
+        self.serve_stale = True
+        # Versions and cursors count from the start of each client, so they are
+        # only meaningful together with this token, unique across processes and restarts
+        self.epoch = os.urandom(6).hex()
         self._current_game_id = None
         self._lineups_data = None
         self._summary_data = None
         self._events_data = None
         self._converted_data = None
+        self._version = 0
+        self._fetched_at = None
+        
+        # Append log of event changes; cursors are increasing integers, given to
+        # clients prefixed with the epoch (see get_event_cursor)
+        self._event_log: List[Dict[str, Any]] = []
+        self._event_cursor = 0
+        self._event_log_start = 0
+        self._event_condition = threading.Condition()
+        
+        # JSON Patches between consecutive versions of the converted data
+        self._patch_log: List[Dict[str, Any]] = []
+        self._patch_log_start = 0
+        self._patch_lock = threading.Lock()
+        
+        # Fetches in progress or just finished, keyed by (game ID, endpoint)
+        self._inflight: Dict[tuple, _Flight] = {}
+        self._inflight_lock = threading.Lock()
+        # Serializes updates of the raw data and the conversion
+        self._data_lock = threading.RLock()
+        self.coalesced_calls = 0
+    
+    @classmethod
+    def breaker(cls, endpoint: str) -> CircuitBreaker:
+        """Get the circuit breaker of an endpoint"""
+        with cls._breakers_lock:
+            breaker = cls._breakers.get(endpoint)
+            if breaker is None:
+                breaker = cls._breakers[endpoint] = CircuitBreaker()
+            return breaker
     
     def _make_request(self, endpoint: str, game_id: int) -> Dict:
         """
         Make a request to the Swedish Hockey API.
         
+        Timeouts, connection errors and retryable status codes are retried with
+        jittered exponential backoff, within MAX_CALL_TIME seconds in total.
+        Calls fail fast while the endpoint's circuit breaker is open.
+        
         Args:
             endpoint (str): API endpoint to call
             game_id (int): ID of the game to fetch
@@ -42,37 +366,104 @@ class SwehockeyAPI:
             dict: Response data as a dictionary
             
         Raises:
-            Exception: If the API request fails
+            CircuitOpenError: If the endpoint has been failing and is not called
+            SwehockeyAPIError: If the API request fails
         """
         # Construct the full URL
         url = f"{self.BASE_URL}{endpoint}/{game_id}"
+        breaker = self.breaker(endpoint)
+        # Callers may hold a game's lock, so all attempts together are bounded
+        deadline = time.monotonic() + self.MAX_CALL_TIME
         
-        # Make the GET request
-        response = requests.get(url, headers=self.HEADERS)
+        for attempt in range(self.MAX_RETRIES + 1):
+            if not breaker.allow():
+                raise CircuitOpenError(f"API endpoint {endpoint} is failing, not retrying yet", endpoint)
+            
+            # Every allowed call reports its outcome, so a half-open trial never stays pending;
+            # an unexpected exception counts as a failure
+            healthy = False
+            try:
+                remaining = max(deadline - time.monotonic(), 0.1)
+                timeout = (min(self.TIMEOUT[0], remaining), min(self.TIMEOUT[1], remaining))
+                try:
+                    response = requests.get(url, headers=self.HEADERS, timeout=timeout)
+                except requests.RequestException as e:
+                    error = SwehockeyAPIError(f"API request failed for endpoint {endpoint}: {e}", endpoint)
+                    retry = isinstance(e, self.RETRY_EXCEPTIONS)
+                else:
+                    # Add a small delay to avoid rate limiting
+                    time.sleep(self.rate_limit_delay)
+                    
+                    if response.status_code == 200:
+                        try:
+                            data = response.json()
+                        except ValueError:
+                            raise SwehockeyAPIError(f"API returned invalid JSON for endpoint {endpoint}", endpoint, 200)
+                        healthy = True
+                        return data
+                    
+                    retry = response.status_code in self.RETRY_STATUS_CODES
+                    # Other errors mean the upstream works, the request is just not valid (e.g. unknown game)
+                    healthy = not retry
+                    error = SwehockeyAPIError(
+                        f"API request failed with status code: {response.status_code} for endpoint {endpoint}",
+                        endpoint, response.status_code
+                    )
+            finally:
+                if healthy:
+                    breaker.record_success()
+                else:
+                    breaker.record_failure()
+            
+            backoff = random.uniform(0, min(self.BACKOFF_MAX, self.BACKOFF_BASE * 2 ** attempt))
+            if not retry or attempt == self.MAX_RETRIES or time.monotonic() + backoff >= deadline:
+                raise error
+            time.sleep(backoff)
+    
+    def _fetch(self, endpoint: str, game_id: int) -> Dict:
+        """
+        Get an endpoint's data, reusing a fresh response fetched by another process.
         
-        # Add a small delay to avoid rate limiting
-        time.sleep(self.rate_limit_delay)
+        Args:
+            endpoint (str): API endpoint to call
+            game_id (int): ID of the game to fetch
+            
+        Returns:
+            dict: Response data as a dictionary
+        """
+        if self.shared_cache is None:
+            return self._request_and_record(endpoint, game_id)
         
-        # Check if the request was successful
-        if response.status_code == 200:
-            # Parse the JSON response
-            return response.json()
-        else:
-            raise Exception(f"API request failed with status code: {response.status_code} for endpoint {endpoint}")
+        key = f"response:{endpoint}:{game_id}"
+        data = self.shared_cache.get(key, max_age=self.coalesce_window)
+        if data is None:
+            data = self._request_and_record(endpoint, game_id)
+            self.shared_cache.set(key, data, ttl=self.coalesce_window)
+        return data
+    
+    def _request_and_record(self, endpoint: str, game_id: int) -> Dict:
+        """Call the API and hand the response to the recorder, if any"""
+        data = self._make_request(endpoint, game_id)
+        if self.recorder is not None:
+            try:
+                self.recorder.append(game_id, endpoint, data)
+            except (OSError, ValueError) as e:
+                print(f"Could not record {endpoint} of game {game_id}: {e}")
+        return data
     
     def get_line_ups(self, game_id: int) -> Dict:
         """Get line-ups data for a game."""
-        return self._make_request("LineUps", game_id)
+        return self._fetch("LineUps", game_id)
     
     def get_summary(self, game_id: int) -> Dict:
         """Get summary/statistics data for a game."""
-        return self._make_request("Summary", game_id)
+        return self._fetch("Summary", game_id)
     
     def get_actions(self, game_id: int) -> Dict:
         """Get actions/events data for a game."""
-        return self._make_request("Actions", game_id)
+        return self._fetch("Actions", game_id)
     
-    def load_game(self, game_id: int) -> Dict:
+    def load_game(self, game_id: int) -> "LazyGame":
         """
         Load complete game data and convert it to a standardized format.
         Caches the raw data and converted result for later refresh operations.
@@ -81,22 +472,31 @@ class SwehockeyAPI:
             game_id (int): ID of the game to fetch
             
         Returns:
-            dict: Converted hockey game data in a standardized format
+            LazyGame: Converted hockey game data in a standardized format, as a
+                      read-only mapping whose sections are converted on first access
         """
-        self._current_game_id = game_id
-        self._lineups_data = self.get_line_ups(game_id)
-        self._summary_data = self.get_summary(game_id)
-        self._events_data = self.get_actions(game_id)
+        def fetch():
+            lineups = self.get_line_ups(game_id)
+            summary = self.get_summary(game_id)
+            events = self.get_actions(game_id)
+            
+            with self._data_lock:
+                if game_id != self._current_game_id:
+                    self._converted_data = None
+                self._current_game_id = game_id
+                self._lineups_data = lineups
+                self._summary_data = summary
+                self._events_data = events
+                return self._update_converted_data()
         
-        self._converted_data = self._convert_hockey_data(self._lineups_data, self._summary_data, self._events_data)
-        return self._converted_data
+        return self._single_flight(game_id, "all", fetch)
     
-    def refresh_lineups(self) -> Dict:
+    def refresh_lineups(self) -> "LazyGame":
         """
         Refresh only the line-ups data for the current game and reconvert the full dataset.
         
         Returns:
-            dict: Updated converted hockey game data
+            LazyGame: Updated converted hockey game data
             
         Raises:
             Exception: If no game has been loaded yet
@@ -104,16 +504,14 @@ class SwehockeyAPI:
         if self._current_game_id is None:
             raise Exception("No game loaded. Call load_game() first.")
         
-        self._lineups_data = self.get_line_ups(self._current_game_id)
-        self._converted_data = self._convert_hockey_data(self._lineups_data, self._summary_data, self._events_data)
-        return self._converted_data
+        return self._refresh_section("LineUps", self.get_line_ups, "_lineups_data")
     
-    def refresh_summary(self) -> Dict:
+    def refresh_summary(self) -> "LazyGame":
         """
         Refresh only the summary/statistics data for the current game and reconvert the full dataset.
         
         Returns:
-            dict: Updated converted hockey game data
+            LazyGame: Updated converted hockey game data
             
         Raises:
             Exception: If no game has been loaded yet
@@ -121,16 +519,14 @@ class SwehockeyAPI:
         if self._current_game_id is None:
             raise Exception("No game loaded. Call load_game() first.")
         
-        self._summary_data = self.get_summary(self._current_game_id)
-        self._converted_data = self._convert_hockey_data(self._lineups_data, self._summary_data, self._events_data)
-        return self._converted_data
+        return self._refresh_section("Summary", self.get_summary, "_summary_data")
     
-    def refresh_actions(self) -> Dict:
+    def refresh_actions(self) -> "LazyGame":
         """
         Refresh only the actions/events data for the current game and reconvert the full dataset.
         
         Returns:
-            dict: Updated converted hockey game data
+            LazyGame: Updated converted hockey game data
             
         Raises:
             Exception: If no game has been loaded yet
@@ -138,16 +534,14 @@ class SwehockeyAPI:
         if self._current_game_id is None:
             raise Exception("No game loaded. Call load_game() first.")
         
-        self._events_data = self.get_actions(self._current_game_id)
-        self._converted_data = self._convert_hockey_data(self._lineups_data, self._summary_data, self._events_data)
-        return self._converted_data
+        return self._refresh_section("Actions", self.get_actions, "_events_data")
     
-    def refresh_all(self) -> Dict:
+    def refresh_all(self) -> "LazyGame":
         """
         Refresh all data for the current game (equivalent to calling load_game again).
         
         Returns:
-            dict: Updated converted hockey game data
+            LazyGame: Updated converted hockey game data
             
         Raises:
             Exception: If no game has been loaded yet
@@ -157,12 +551,473 @@ class SwehockeyAPI:
         
         return self.load_game(self._current_game_id)
     
+    def _refresh_section(self, endpoint: str, getter, attribute: str) -> "LazyGame":
+        """
+        Fetch one endpoint of the current game and reconvert the full dataset.
+        
+        Args:
+            endpoint (str): Endpoint name, used to coalesce identical refreshes
+            getter: Method fetching the endpoint for a game ID
+            attribute (str): Attribute holding the endpoint's raw data
+            
+        Returns:
+            LazyGame: Updated converted hockey game data
+        """
+        game_id = self._current_game_id
+        
+        def fetch():
+            data = getter(game_id)
+            with self._data_lock:
+                if game_id != self._current_game_id:
+                    raise Exception(f"Game {game_id} was replaced while refreshing {endpoint}")
+                setattr(self, attribute, data)
+                return self._update_converted_data()
+        
+        return self._single_flight(game_id, endpoint, fetch)
+    
+    def _single_flight(self, game_id: int, endpoint: str, fetch) -> "LazyGame":
+        """
+        Run a fetch, sharing it with every concurrent call for the same game and endpoint.
+        
+        The first caller performs the fetch and conversion; callers arriving while
+        it runs, or within coalesce_window seconds after it succeeded, share its
+        outcome without contacting the API again. They get the game's latest data,
+        which a refresh of another endpoint may have made newer than the shared
+        result, or the same exception or stale data.
+        
+        Args:
+            game_id (int): ID of the game
+            endpoint (str): Endpoint name, or "all" for a full load
+            fetch: Function performing the fetch and returning the converted data
+            
+        Returns:
+            LazyGame: Converted hockey game data
+        """
+        key = (game_id, endpoint)
+        with self._inflight_lock:
+            flight = self._inflight.get(key)
+            if flight is not None and not flight.is_fresh(self.coalesce_window):
+                flight = None
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+            else:
+                self.coalesced_calls += 1
+        
+        if not leader:
+            result = flight.wait()
+            with self._data_lock:
+                if result.get("stale") or game_id != self._current_game_id or self._converted_data is None:
+                    return result
+                return self._converted_data
+        
+        try:
+            flight.result = self._fetch_or_stale(game_id, fetch)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            flight.finish()
+    
+    def _fetch_or_stale(self, game_id: int, fetch) -> "LazyGame":
+        """
+        Run a fetch, falling back to the last good data of the game if the API fails.
+        
+        The fallback is a copy of the converted data with a "stale" entry holding
+        the age of the data in seconds and the error.
+        
+        Raises:
+            SwehockeyAPIError: If the API fails and there is no data to fall back to
+        """
+        try:
+            return fetch()
+        except SwehockeyAPIError as e:
+            previous = self._converted_data
+            if not self.serve_stale or previous is None or game_id != self._current_game_id:
+                raise
+            return previous.with_values(stale={
+                "age": round(time.time() - self._fetched_at, 1),
+                "error": str(e)
+            })
+    
+    def _update_converted_data(self) -> "LazyGame":
+        """
+        Wrap the cached raw data in a new lazily converted game and bump the
+        snapshot version if anything changed.
+        
+        Sections whose payloads did not change are carried over without being
+        converted again. Events are only converted to update the event log when
+        the Actions or LineUps payload changed.
+        
+        Returns:
+            LazyGame: Current converted hockey game data
+        """
+        self._fetched_at = time.time()
+        previous = self._converted_data
+        changed = set()
+        if previous is None:
+            converted = LazyGame(self, self._lineups_data, self._summary_data, self._events_data)
+        else:
+            converted, changed = previous.updated(self._lineups_data, self._summary_data, self._events_data)
+            if not changed:
+                # Only the fetch timestamp moved, keep the snapshot (and its version)
+                previous.update_timestamp(self._events_data)
+                return previous
+        
+        self._converted_data = converted
+        self._version += 1
+        key = (self.epoch, self._current_game_id, self._version)
+        converted.section_keys = {
+            section: key if previous is None or changed & set(sources) else previous.section_keys.get(section, key)
+            for section, sources in LazyGame.SECTIONS.items()
+        }
+        if previous is None or changed & {"lineups", "events"}:
+            self._log_event_changes(previous, converted)
+        self._log_patch(previous, converted, changed)
+        return converted
+    
+    def _log_patch(self, previous: Optional["LazyGame"], converted: "LazyGame", changed: Set[str]) -> None:
+        """
+        Append the JSON Patch from the previous to the new version to the patch log.
+        
+        Only sections built from a changed payload are compared. A section the
+        previous version never converted is replaced as a whole rather than
+        converted just to be compared.
+        
+        Args:
+            previous: Converted data before the refresh, None for a newly loaded game
+            converted: Newly converted data
+            changed: Payloads that changed ("lineups", "summary", "events")
+        """
+        if previous is None:
+            # A new game: clients must fetch the whole document at this version
+            with self._patch_lock:
+                self._patch_log = []
+                self._patch_log_start = self._version
+            return
+        
+        patch = []
+        for section, sources in LazyGame.SECTIONS.items():
+            # The fetch timestamp moves without a new version, so it is not part of the versioned document
+            if section == "timestamp" or not changed & set(sources):
+                continue
+            if section in previous.materialized:
+                patch.extend(make_patch(previous[section], converted[section], f"/{section}"))
+            else:
+                patch.append({"op": "replace", "path": f"/{section}", "value": converted[section]})
+        
+        with self._patch_lock:
+            self._patch_log.append({"version": self._version, "patch": patch})
+            if len(self._patch_log) > self.PATCH_LOG_SIZE:
+                self._patch_log = self._patch_log[-self.PATCH_LOG_SIZE:]
+                self._patch_log_start = self._patch_log[0]["version"] - 1
+    
+    def version_token(self, version: int) -> str:
+        """
+        Get the opaque form of a snapshot version given to clients.
+        
+        Args:
+            version: Snapshot version (see get_version)
+            
+        Returns:
+            str: Version to pass to patches_since(), meaningful only to this client
+        """
+        return self._make_token(version)
+    
+    def patches_since(self, version: Optional[str]) -> Dict[str, Any]:
+        """
+        Get the JSON Patch (RFC 6902) from a version of the converted data to the current one.
+        
+        Args:
+            version: Version the client has (see version_token)
+            
+        Returns:
+            dict: "version" the patch leads to, "reset" if the client must fetch
+                  the whole document instead (the version is too old, belongs to
+                  another game or comes from another worker or from before a
+                  restart) and the "patch" operations, in order
+        """
+        number = self._parse_token(version)
+        with self._patch_lock:
+            # The last logged version, a refresh may be between bumping the version and logging
+            current = self._patch_log[-1]["version"] if self._patch_log else self._patch_log_start
+            if number is None or number < self._patch_log_start or number > current:
+                return {"version": self._make_token(current), "reset": True, "patch": []}
+            patch = []
+            for entry in self._patch_log:
+                if entry["version"] > number:
+                    patch.extend(entry["patch"])
+        return {"version": self._make_token(current), "reset": False, "patch": patch}
+    
+    def _log_event_changes(self, previous: Optional[Dict], converted: Dict) -> None:
+        """
+        Append the events added, changed or removed by a conversion to the event log.
+        
+        Args:
+            previous: Converted data before the refresh, None for a newly loaded game
+            converted: Newly converted data
+        """
+        if previous is None:
+            # A new game: start an empty log. Clients holding older cursors (or 0)
+            # get the full event list once, so events need not be converted yet
+            with self._event_condition:
+                self._event_log = []
+                self._event_cursor += 1
+                self._event_log_start = self._event_cursor
+                self._event_condition.notify_all()
+            return
+        
+        old_events = previous["events"]
+        with self._event_condition:
+            for op, event in self._diff_events(old_events, converted["events"]):
+                self._event_cursor += 1
+                self._event_log.append({
+                    "cursor": self._event_cursor,
+                    "op": op,
+                    "id": event["id"],
+                    "event": event
+                })
+            
+            if len(self._event_log) > self.EVENT_LOG_SIZE:
+                dropped = self._event_log[:-self.EVENT_LOG_SIZE]
+                self._event_log = self._event_log[-self.EVENT_LOG_SIZE:]
+                self._event_log_start = dropped[-1]["cursor"]
+            
+            self._event_condition.notify_all()
+    
+    @staticmethod
+    def _diff_events(old_events: List[Dict], new_events: List[Dict]) -> List[tuple]:
+        """
+        Compare two event lists by event ID.
+        
+        Args:
+            old_events: Events before the refresh
+            new_events: Events after the refresh
+            
+        Returns:
+            List of (operation, event) tuples in the order of the new event list,
+            removals last. Operation is "added", "changed" or "removed".
+        """
+        old_by_id = {event["id"]: event for event in old_events}
+        new_ids = set()
+        changes = []
+        
+        for event in new_events:
+            new_ids.add(event["id"])
+            old_event = old_by_id.get(event["id"])
+            if old_event is None:
+                changes.append(("added", event))
+            elif old_event != event:
+                changes.append(("changed", event))
+        
+        for event in old_events:
+            if event["id"] not in new_ids:
+                changes.append(("removed", event))
+        
+        return changes
+    
+    def _make_token(self, number: int) -> str:
+        """Opaque cursor or version for clients: the number prefixed with the client's epoch"""
+        return f"{self.epoch}:{number}"
+    
+    def _parse_token(self, token: Optional[str]) -> Optional[int]:
+        """Number in a token from _make_token, None if it is invalid or from another epoch"""
+        epoch, _, number = str(token or "").partition(":")
+        if epoch != self.epoch or not number.isdigit():
+            return None
+        return int(number)
+    
+    def get_event_cursor(self) -> str:
+        """
+        Get the cursor of the latest event change.
+        
+        Returns:
+            str: Opaque cursor to pass to events_since() to receive only later changes
+        """
+        return self._make_token(self._event_cursor)
+    
+    def events_since(self, cursor: Optional[str]) -> Dict[str, Any]:
+        """
+        Get the event changes made after a cursor.
+        
+        Args:
+            cursor: Cursor returned by an earlier call (None for everything)
+            
+        Returns:
+            dict: "cursor" to use next time, "reset" if the client must drop its events
+                  (the cursor is too old, belongs to another game or comes from another
+                  worker or from before a restart) and "changes", with at most one
+                  change per event ID
+        """
+        position = self._parse_token(cursor)
+        with self._event_condition:
+            log = self._event_log
+            current = self._event_cursor
+            reset = position is None or position < self._event_log_start or position > current
+        
+        if reset:
+            # Everything the client knows may be outdated, send the current events
+            events = self._converted_data["events"] if self._converted_data else []
+            changes = [{"op": "added", "id": event["id"], "event": event} for event in events]
+            return {"cursor": self._make_token(current), "reset": True, "changes": changes}
+        
+        # Collapse repeated changes of the same event into the latest one
+        latest = {}
+        for entry in log[self._find_log_position(log, position):]:
+            latest.pop(entry["id"], None)
+            latest[entry["id"]] = entry
+        
+        changes = []
+        for entry in latest.values():
+            change = {"op": entry["op"], "id": entry["id"]}
+            if entry["op"] != "removed":
+                change["event"] = entry["event"]
+            changes.append(change)
+        
+        return {"cursor": self._make_token(current), "reset": False, "changes": changes}
+    
+    def event_changes_since(self, cursor: str) -> List[tuple]:
+        """
+        Get every logged event change after a cursor, in order.
+        
+        Args:
+            cursor: Cursor from get_event_cursor()
+            
+        Returns:
+            List of (operation, event) tuples, empty if the cursor is from another epoch
+        """
+        position = self._parse_token(cursor)
+        if position is None:
+            return []
+        log = self._event_log
+        return [(entry["op"], entry["event"]) for entry in log[self._find_log_position(log, position):]]
+    
+    @staticmethod
+    def _find_log_position(log: List[Dict[str, Any]], cursor: int) -> int:
+        """Binary search for the first log entry after a cursor"""
+        low, high = 0, len(log)
+        while low < high:
+            middle = (low + high) // 2
+            if log[middle]["cursor"] <= cursor:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+    
+    def wait_for_events(self, cursor: str, timeout: float) -> bool:
+        """
+        Block until there are event changes after a cursor (long-polling).
+        
+        Args:
+            cursor: Cursor the client already has
+            timeout: Maximum number of seconds to wait
+            
+        Returns:
+            bool: True if changes are available (or the cursor needs a reset), False on timeout
+        """
+        position = self._parse_token(cursor)
+        if position is None:
+            return True
+        with self._event_condition:
+            return self._event_condition.wait_for(lambda: self._event_cursor != position, timeout)
+    
+    @staticmethod
+    def _without_timestamp(data: Dict) -> Dict:
+        """Shallow copy of an Actions payload without its per-fetch Timestamp"""
+        return {key: value for key, value in data.items() if key != "Timestamp"}
+    
+    def get_version(self) -> int:
+        """
+        Get the version of the current converted data.
+        The version increases every time a load or refresh changes the converted data.
+        
+        Returns:
+            int: Snapshot version, 0 if no data is loaded
+        """
+        return self._version
+    
+    def export_state(self) -> Dict[str, Any]:
+        """
+        Get the client's state for a snapshot (see state_snapshot.StateSnapshotter).
+        
+        The state holds the raw payloads, the sections converted so far, the
+        version and the event and patch logs with their cursors.
+        
+        Returns:
+            dict: State for import_state, made of plain data only
+        """
+        with self._data_lock:
+            converted = self._converted_data
+            state = {
+                "game_id": self._current_game_id,
+                "lineups": self._lineups_data,
+                "summary": self._summary_data,
+                "events": self._events_data,
+                "version": self._version,
+                "fetched_at": self._fetched_at,
+                "sections": {section: converted[section] for section in converted.materialized} if converted else {}
+            }
+        with self._event_condition:
+            state["event_log"] = list(self._event_log)
+            state["event_cursor"] = self._event_cursor
+            state["event_log_start"] = self._event_log_start
+        with self._patch_lock:
+            state["patch_log"] = list(self._patch_log)
+            state["patch_log_start"] = self._patch_log_start
+        return state
+    
+    def import_state(self, state: Dict[str, Any]) -> None:
+        """
+        Restore a state from export_state without calling the API.
+        
+        Converted sections are taken over as they were; refreshes continue from
+        the restored version and logs. The client keeps its own epoch, so
+        versions and cursors handed out by the client that saved the state, or
+        by another worker restoring the same state, get a reset.
+        
+        Args:
+            state: State returned by export_state
+        """
+        with self._data_lock:
+            self._current_game_id = state["game_id"]
+            self._lineups_data = state["lineups"]
+            self._summary_data = state["summary"]
+            self._events_data = state["events"]
+            self._version = state["version"]
+            self._fetched_at = state["fetched_at"]
+            self._converted_data = None
+            if self._lineups_data is not None:
+                self._converted_data = LazyGame(self, self._lineups_data, self._summary_data, self._events_data,
+                                                values=state["sections"])
+                key = (self.epoch, self._current_game_id, self._version)
+                self._converted_data.section_keys = {section: key for section in LazyGame.SECTIONS}
+        with self._event_condition:
+            self._event_log = list(state["event_log"])
+            self._event_cursor = state["event_cursor"]
+            self._event_log_start = state["event_log_start"]
+            self._event_condition.notify_all()
+        with self._patch_lock:
+            self._patch_log = list(state["patch_log"])
+            self._patch_log_start = state["patch_log_start"]
+    
+    def get_snapshot(self) -> Tuple[int, Optional["LazyGame"]]:
+        """
+        Get the version and the current converted data together, consistent with each other.
+        
+        Returns:
+            tuple: Snapshot version and converted data (None if no data is loaded)
+        """
+        with self._data_lock:
+            return self._version, self._converted_data
+    
     def get_current_data(self) -> Optional[Dict]:
         """
         Get the currently loaded and converted data without making any API calls.
         
         Returns:
-            dict: Current converted hockey game data or None if no data is loaded
+            LazyGame: Current converted hockey game data or None if no data is loaded
         """
         return self._converted_data
     
@@ -178,45 +1033,15 @@ class SwehockeyAPI:
         Returns:
             dict: Unified hockey game data in the improved structure
         """
-        # Initialize the output structure
-        result = {
-            "game": {},
-            "teams": {
-                "home": {},
-                "away": {}
-            },
-            "personnel": {
-                "coaches": {
-                    "home": [],
-                    "away": []
-                },
-                "officials": []
-            },
-            "roster": {
-                "home": {
-                    "goalies": [],
-                    "players": []
-                },
-                "away": {
-                    "goalies": [],
-                    "players": []
-                }
-            },
-            "statistics": {
-                "byPeriod": [],
-                "total": {
-                    "home": {},
-                    "away": {}
-                }
-            },
-            "events": []
-        }
-        
-        # Extract game information
+        return LazyGame(self, lineups_data, summary_data, events_data).to_dict()
+    
+    def _convert_game(self, lineups_data: Dict, summary_data: Dict) -> Dict:
+        """
+        Convert the game information (date, tournament, venue, status and result).
+        """
         game_ticker = lineups_data["GameTicker"]
         
-        # Fill game information
-        result["game"] = {
+        return {
             "id": game_ticker["Id"],
             "date": game_ticker["GameDate"],
             "tournament": {
@@ -236,9 +1061,15 @@ class SwehockeyAPI:
                 "periodResults": self._format_period_results(game_ticker["PeriodResults"])
             }
         }
+    
+    def _convert_teams(self, lineups_data: Dict) -> Dict:
+        """
+        Convert the home and away team information.
+        """
+        game_ticker = lineups_data["GameTicker"]
         
-        # Fill team information
-        result["teams"]["home"] = {
+        teams = {}
+        teams["home"] = {
             "id": game_ticker["Home"]["Id"],
             "clubId": game_ticker["Home"]["ClubId"],
             "name": game_ticker["Home"]["Name"],
@@ -249,7 +1080,7 @@ class SwehockeyAPI:
             "goals": game_ticker["Home"]["Goals"]
         }
         
-        result["teams"]["away"] = {
+        teams["away"] = {
             "id": game_ticker["Guest"]["Id"],
             "clubId": game_ticker["Guest"]["ClubId"],
             "name": game_ticker["Guest"]["Name"],
@@ -260,18 +1091,33 @@ class SwehockeyAPI:
             "goals": game_ticker["Guest"]["Goals"]
         }
         
-        # Fill personnel information (coaches and officials)
+        return teams
+    
+    def _convert_personnel(self, lineups_data: Dict) -> Dict:
+        """
+        Convert the coaches and officials.
+        """
+        game_ticker = lineups_data["GameTicker"]
+        
+        personnel = {
+            "coaches": {
+                "home": [],
+                "away": []
+            },
+            "officials": []
+        }
+        
         if "LineUp" in game_ticker and "TeamOfficials" in game_ticker["LineUp"]:
             for official in game_ticker["LineUp"]["TeamOfficials"]:
                 if "Home" in official and official["Home"]:
-                    result["personnel"]["coaches"]["home"].append({
+                    personnel["coaches"]["home"].append({
                         "id": official["Home"]["Id"],
                         "name": official["Home"]["Name"],
                         "type": official["Home"]["Type"]
                     })
                 
                 if "Guest" in official and official["Guest"]:
-                    result["personnel"]["coaches"]["away"].append({
+                    personnel["coaches"]["away"].append({
                         "id": official["Guest"]["Id"],
                         "name": official["Guest"]["Name"],
                         "type": official["Guest"]["Type"]
@@ -281,13 +1127,31 @@ class SwehockeyAPI:
             for official_type in game_ticker["OfficialTypes"]:
                 type_name = official_type["Name"]
                 for official in official_type["Officials"]:
-                    result["personnel"]["officials"].append({
+                    personnel["officials"].append({
                         "id": official["Id"],
                         "name": official["Name"],
                         "type": type_name
                     })
         
-        # Fill roster information
+        return personnel
+    
+    def _convert_roster(self, lineups_data: Dict) -> Dict:
+        """
+        Convert the goalies and players of both teams.
+        """
+        game_ticker = lineups_data["GameTicker"]
+        
+        roster = {
+            "home": {
+                "goalies": [],
+                "players": []
+            },
+            "away": {
+                "goalies": [],
+                "players": []
+            }
+        }
+        
         if "LineUp" in game_ticker and "Lines" in game_ticker["LineUp"]:
             for line in game_ticker["LineUp"]["Lines"]:
                 line_id = line["Id"]
@@ -307,10 +1171,10 @@ class SwehockeyAPI:
                         }
                         
                         if is_goalie:
-                            result["roster"]["home"]["goalies"].append(player_data)
+                            roster["home"]["goalies"].append(player_data)
                         else:
                             player_data["line"] = line_id
-                            result["roster"]["home"]["players"].append(player_data)
+                            roster["home"]["players"].append(player_data)
                     
                     # Process away player
                     if "Guest" in player_item and player_item["Guest"]:
@@ -325,12 +1189,25 @@ class SwehockeyAPI:
                         }
                         
                         if is_goalie:
-                            result["roster"]["away"]["goalies"].append(player_data)
+                            roster["away"]["goalies"].append(player_data)
                         else:
                             player_data["line"] = line_id
-                            result["roster"]["away"]["players"].append(player_data)
+                            roster["away"]["players"].append(player_data)
+        
+        return roster
+    
+    def _convert_statistics(self, summary_data: Dict) -> Dict:
+        """
+        Convert the statistics by period and for the whole game.
+        """
+        statistics = {
+            "byPeriod": [],
+            "total": {
+                "home": {},
+                "away": {}
+            }
+        }
         
-        # Fill statistics information
         if "Categories" in summary_data["GameTicker"]:
             # Process period statistics
             for category in summary_data["GameTicker"]["Categories"]:
@@ -348,7 +1225,7 @@ class SwehockeyAPI:
                             period_stats["home"][stat_name] = self._parse_stat_value(item["TeamItem"]["ValueHome"])
                             period_stats["away"][stat_name] = self._parse_stat_value(item["TeamItem"]["ValueGuest"])
                     
-                    result["statistics"]["byPeriod"].append(period_stats)
+                    statistics["byPeriod"].append(period_stats)
             
             # Process total statistics
             for category in summary_data["GameTicker"]["Categories"]:
@@ -359,27 +1236,38 @@ class SwehockeyAPI:
                             
                             if stat_name == "shots":
                                 # Extract shot percentage and total shots
-                                result["statistics"]["total"]["home"]["shotPercentage"] = self._extract_percentage(item["TeamItem"]["ValueHome"])
-                                result["statistics"]["total"]["home"]["shots"] = self._extract_number_in_parenthesis(item["TeamItem"]["ValueHome"])
-                                result["statistics"]["total"]["away"]["shotPercentage"] = self._extract_percentage(item["TeamItem"]["ValueGuest"])
-                                result["statistics"]["total"]["away"]["shots"] = self._extract_number_in_parenthesis(item["TeamItem"]["ValueGuest"])
+                                statistics["total"]["home"]["shotPercentage"] = self._extract_percentage(item["TeamItem"]["ValueHome"])
+                                statistics["total"]["home"]["shots"] = self._extract_number_in_parenthesis(item["TeamItem"]["ValueHome"])
+                                statistics["total"]["away"]["shotPercentage"] = self._extract_percentage(item["TeamItem"]["ValueGuest"])
+                                statistics["total"]["away"]["shots"] = self._extract_number_in_parenthesis(item["TeamItem"]["ValueGuest"])
                             elif stat_name == "saves":
                                 # Extract save percentage and total saves
-                                result["statistics"]["total"]["home"]["savePercentage"] = self._extract_percentage(item["TeamItem"]["ValueHome"])
-                                result["statistics"]["total"]["home"]["saves"] = self._extract_number_in_parenthesis(item["TeamItem"]["ValueHome"])
-                                result["statistics"]["total"]["away"]["savePercentage"] = self._extract_percentage(item["TeamItem"]["ValueGuest"])
-                                result["statistics"]["total"]["away"]["saves"] = self._extract_number_in_parenthesis(item["TeamItem"]["ValueGuest"])
+                                statistics["total"]["home"]["savePercentage"] = self._extract_percentage(item["TeamItem"]["ValueHome"])
+                                statistics["total"]["home"]["saves"] = self._extract_number_in_parenthesis(item["TeamItem"]["ValueHome"])
+                                statistics["total"]["away"]["savePercentage"] = self._extract_percentage(item["TeamItem"]["ValueGuest"])
+                                statistics["total"]["away"]["saves"] = self._extract_number_in_parenthesis(item["TeamItem"]["ValueGuest"])
                             elif stat_name == "powerPlayPercentage":
                                 # Extract power play percentage and time
-                                result["statistics"]["total"]["home"]["powerPlayPercentage"] = self._extract_percentage(item["TeamItem"]["ValueHome"])
-                                result["statistics"]["total"]["home"]["powerPlayTime"] = self._extract_time_in_parenthesis(item["TeamItem"]["ValueHome"])
-                                result["statistics"]["total"]["away"]["powerPlayPercentage"] = self._extract_percentage(item["TeamItem"]["ValueGuest"])
-                                result["statistics"]["total"]["away"]["powerPlayTime"] = self._extract_time_in_parenthesis(item["TeamItem"]["ValueGuest"])
+                                statistics["total"]["home"]["powerPlayPercentage"] = self._extract_percentage(item["TeamItem"]["ValueHome"])
+                                statistics["total"]["home"]["powerPlayTime"] = self._extract_time_in_parenthesis(item["TeamItem"]["ValueHome"])
+                                statistics["total"]["away"]["powerPlayPercentage"] = self._extract_percentage(item["TeamItem"]["ValueGuest"])
+                                statistics["total"]["away"]["powerPlayTime"] = self._extract_time_in_parenthesis(item["TeamItem"]["ValueGuest"])
                             else:
-                                result["statistics"]["total"]["home"][stat_name] = self._parse_stat_value(item["TeamItem"]["ValueHome"])
-                                result["statistics"]["total"]["away"][stat_name] = self._parse_stat_value(item["TeamItem"]["ValueGuest"])
+                                statistics["total"]["home"][stat_name] = self._parse_stat_value(item["TeamItem"]["ValueHome"])
+                                statistics["total"]["away"][stat_name] = self._parse_stat_value(item["TeamItem"]["ValueGuest"])
+        
+        return statistics
+    
+    def _convert_events(self, events_data: Dict, roster: Dict) -> List[Dict]:
+        """
+        Convert the game events.
+        
+        Args:
+            events_data: Game events data
+            roster: Converted roster, used to resolve the players of assists
+        """
+        events = []
         
-        # Fill events information
         if "Periods" in events_data["GameTicker"]:
             for period in events_data["GameTicker"]["Periods"]:
                 period_id = period["Id"]
@@ -428,18 +1316,21 @@ class SwehockeyAPI:
                         # Parse assists as a list of player objects instead of a string
                         # Pass the team information (is_home_team) to the assist parser
                         if event["Assist"]:
-                            event_data["assists"] = self._parse_assists(event["Assist"], result["roster"], is_home_team)
+                            event_data["assists"] = self._parse_assists(event["Assist"], roster, is_home_team)
                     else:
                         # For non-goal events, keep the original assist field if present
                         if event["Assist"]:
                             event_data["assist"] = event["Assist"]
                     
-                    result["events"].append(event_data)
-        
-        # Add timestamp
-        result["timestamp"] = events_data.get("Timestamp", "")
+                    events.append(event_data)
         
-        return result
+        return events
+    
+    def _convert_timestamp(self, events_data: Dict) -> str:
+        """
+        Get the fetch timestamp of the events data.
+        """
+        return events_data.get("Timestamp", "")
     
     # Helper methods
     
@@ -623,7 +1514,7 @@ class SwehockeyAPI:
             game_id: ID of the game to fetch
             filepath: Path where the JSON file should be saved
         """
-        game_data = self.load_game(game_id)
+        game_data = self.load_game(game_id).to_dict()
         
         with open(filepath, 'w', encoding='utf-8') as f:
             json.dump(game_data, f, ensure_ascii=False, indent=2)
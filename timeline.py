@@ -0,0 +1,413 @@
+import bisect
+from typing import Any, Dict, List, Optional, Tuple
+
+# Team on the ice: number of skaters and whether the goalie is in net
+TeamState = Tuple[int, bool]
+
+
+def parse_clock(time_str: str) -> int:
+    """
+    Convert a game clock string to seconds.
+
+    Args:
+        time_str: Time in format "MM:SS" (minutes may exceed 59)
+
+    Returns:
+        int: Seconds
+    """
+    minutes, seconds = time_str.split(":")
+    return int(minutes) * 60 + int(seconds)
+
+
+def format_clock(seconds: int) -> str:
+    """Format seconds as a game clock string (MM:SS)"""
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+
+class _Penalty:
+    """A penalty as it is served, possibly delayed or cut short by a power play goal."""
+
+    __slots__ = ("event", "team", "length", "parts", "terminable", "start", "end")
+
+    def __init__(self, event: Dict[str, Any], team: str, length: int, parts: int, terminable: bool):
+        self.event = event
+        self.team = team
+        self.length = length
+        self.parts = parts
+        self.terminable = terminable
+        self.start = None
+        self.end = None
+
+
+class GameTimeline:
+    """
+    Time index of a game's events with reconstructed on-ice strength.
+
+    Event times are converted to absolute game seconds and kept sorted, so
+    range queries are binary searches. Penalty and goalie-pulled intervals are
+    replayed once into piecewise-constant strength segments, which makes the
+    strength at any moment an O(log n) lookup.
+
+    The reconstruction follows the usual rules: at most two penalized players
+    per team reduce its strength (further penalties start when one of those
+    ends), a power play goal ends the first terminable minor of the team that
+    is shorthanded, and coincident penalties of equal length to both teams are
+    served without changing the strength.
+    """
+
+    PERIOD_LENGTH = 20 * 60
+    SKATERS = 5
+    MIN_SKATERS = 3
+
+    # Penalty minutes -> (seconds served per part, number of parts, ends on a power play goal)
+    PENALTY_RULES = {
+        2: (120, 1, True),   # Minor
+        4: (120, 2, True),   # Double minor, served as two minors
+        5: (300, 1, False),  # Major
+        20: (300, 1, False)  # Match penalty, a substitute serves five minutes
+    }
+
+    def __init__(self, events: List[Dict[str, Any]], end: Optional[int] = None,
+                 period_length: int = PERIOD_LENGTH):
+        """
+        Build the timeline.
+
+        Args:
+            events: Converted events of the game
+            end: Game second the game has reached (defaults to the last event)
+            period_length: Length of a regulation period in seconds
+        """
+        self.period_length = period_length
+        self.cumulative = self._detect_cumulative(events)
+
+        timed = sorted(((self.seconds(event), index, event) for index, event in enumerate(events)),
+                       key=lambda item: (item[0], item[1]))
+        self.times = [seconds for seconds, _, _ in timed]
+        self.events = [event for _, _, event in timed]
+        self.end = max(end if end is not None else 0, self.times[-1] if self.times else 0)
+
+        self.penalty_intervals: List[Dict[str, Any]] = []
+        self.goalie_pulled_intervals: List[Dict[str, Any]] = []
+        self.goal_states: Dict[Any, Dict[str, TeamState]] = {}
+        self._segment_starts: List[int] = []
+        self._segment_states: List[Dict[str, TeamState]] = []
+        self._replay()
+
+    @classmethod
+    def from_game(cls, game_data: Dict[str, Any]) -> "GameTimeline":
+        """
+        Build the timeline of converted game data.
+        A finished game ends with its last regulation period, or at its last
+        event when it went to overtime.
+
+        Args:
+            game_data: Converted hockey game data
+
+        Returns:
+            GameTimeline: The timeline
+        """
+        events = game_data["events"]
+        end = None
+        if game_data["game"]["status"]["isEnded"] and events:
+            last_period = max(event["period"] for event in events)
+            end = min(last_period, 3) * cls.PERIOD_LENGTH
+        return cls(events, end)
+
+    def _detect_cumulative(self, events: List[Dict[str, Any]]) -> bool:
+        """
+        Decide whether clock times count from the start of the game or of each period.
+        Times after the first period that are below the period's start can only be
+        per-period times; cumulative is assumed when nothing contradicts it.
+        """
+        votes = 0
+        for event in events:
+            if event["period"] > 1:
+                start = (event["period"] - 1) * self.period_length
+                votes += 1 if parse_clock(event["time"]) >= start else -1
+        return votes >= 0
+
+    def seconds(self, event: Dict[str, Any]) -> int:
+        """
+        Get the absolute game second of an event.
+
+        Args:
+            event: Converted event with "period" and "time"
+
+        Returns:
+            int: Seconds since the start of the game
+        """
+        clock = parse_clock(event["time"])
+        if self.cumulative:
+            return clock
+        return (event["period"] - 1) * self.period_length + clock
+
+    def events_between(self, start: int, end: int) -> List[Dict[str, Any]]:
+        """
+        Get the events in a time range.
+
+        Args:
+            start: First game second (inclusive)
+            end: Last game second (exclusive)
+
+        Returns:
+            List of events in time order
+        """
+        return self.events[bisect.bisect_left(self.times, start):bisect.bisect_left(self.times, end)]
+
+    def _replay(self) -> None:
+        """Replay penalties, goals and goalie changes into strength segments"""
+        running = {"home": [], "away": []}
+        waiting = {"home": [], "away": []}
+        goalie_out = {"home": None, "away": None}
+
+        def state() -> Dict[str, TeamState]:
+            return {
+                team: (self.SKATERS - len(running[team]), goalie_out[team] is None)
+                for team in ("home", "away")
+            }
+
+        def mark(t: int) -> None:
+            current = state()
+            if self._segment_states and self._segment_starts[-1] == t:
+                self._segment_states[-1] = current
+            elif not self._segment_states or self._segment_states[-1] != current:
+                self._segment_starts.append(t)
+                self._segment_states.append(current)
+
+        def start_penalty(penalty: _Penalty, t: int) -> None:
+            penalty.start = t
+            penalty.end = t + penalty.length
+            running[penalty.team].append(penalty)
+
+        def finish_penalty(penalty: _Penalty, t: int, ended_by: str) -> None:
+            running[penalty.team].remove(penalty)
+            self.penalty_intervals.append({
+                "team": penalty.team,
+                "eventId": penalty.event["id"],
+                "start": penalty.start,
+                "end": t,
+                "endedBy": ended_by,
+                "affectsStrength": True
+            })
+            if penalty.parts > 1:
+                penalty.parts -= 1
+                start_penalty(penalty, t)
+            elif waiting[penalty.team]:
+                start_penalty(waiting[penalty.team].pop(0), t)
+
+        def advance(t: int) -> None:
+            # Expire penalties in end order; an expiry may start a waiting penalty
+            while True:
+                due = [p for team in running.values() for p in team if p.end <= t]
+                if not due:
+                    return
+                penalty = min(due, key=lambda p: p.end)
+                finish_penalty(penalty, penalty.end, "expired")
+                mark(penalty.end)
+
+        def end_goalie_pull(team: str, t: int) -> None:
+            start = goalie_out[team]
+            goalie_out[team] = None
+            if t > start:
+                self.goalie_pulled_intervals.append({"team": team, "start": start, "end": t})
+
+        mark(0)
+        index = 0
+        while index < len(self.events):
+            t = self.times[index]
+
+            # The goalie is back in net at the start of every period
+            period_start = (self.events[index]["period"] - 1) * self.period_length
+            pulled = [team for team in ("home", "away")
+                      if goalie_out[team] is not None and goalie_out[team] < period_start <= t]
+            if pulled:
+                advance(period_start)
+                for team in pulled:
+                    end_goalie_pull(team, period_start)
+                mark(period_start)
+            advance(t)
+
+            # Penalties given at the same moment are handled together to find coincident ones
+            batch = []
+            while index < len(self.events) and self.times[index] == t:
+                batch.append(self.events[index])
+                index += 1
+
+            new_penalties = []
+            for event in batch:
+                if event["type"] == "penalty":
+                    rule = self.PENALTY_RULES.get(event.get("duration"))
+                    if rule is None:
+                        # Misconducts and unknown penalties do not change the strength
+                        self.penalty_intervals.append({
+                            "team": event["team"],
+                            "eventId": event["id"],
+                            "start": t,
+                            "end": t + 60 * (event.get("duration") or 0),
+                            "endedBy": "expired",
+                            "affectsStrength": False
+                        })
+                        continue
+                    length, parts, terminable = rule
+                    new_penalties.append(_Penalty(event, event["team"], length, parts, terminable))
+
+                elif event["type"] == "goalie-out":
+                    if goalie_out[event["team"]] is None:
+                        goalie_out[event["team"]] = t
+
+                elif event["type"] == "goalie-in":
+                    if goalie_out[event["team"]] is not None:
+                        end_goalie_pull(event["team"], t)
+
+                elif event["type"] == "goal":
+                    self._score(event, t, running, finish_penalty, state)
+
+            for penalty in self._without_coincident(new_penalties, t):
+                if len(running[penalty.team]) < self.SKATERS - self.MIN_SKATERS:
+                    start_penalty(penalty, t)
+                else:
+                    waiting[penalty.team].append(penalty)
+            mark(t)
+
+        advance(self.end)
+        for team in ("home", "away"):
+            for penalty in list(running[team]):
+                finish_penalty(penalty, self.end, "running")
+            waiting[team].clear()
+            if goalie_out[team] is not None:
+                end_goalie_pull(team, self.end)
+
+        self.penalty_intervals.sort(key=lambda interval: (interval["start"], interval["end"]))
+
+    def _score(self, goal: Dict[str, Any], t: int, running: Dict[str, list], finish_penalty, state) -> None:
+        """Record the strength of a goal and end the minor it cuts short"""
+        current = state()
+        self.goal_states[goal["id"]] = current
+
+        scorer = goal["team"]
+        opponent = "away" if scorer == "home" else "home"
+        if current[scorer][0] > current[opponent][0]:
+            minors = [p for p in running[opponent] if p.terminable]
+            if minors:
+                finish_penalty(min(minors, key=lambda p: p.start), t, "goal")
+
+    def _without_coincident(self, penalties: List[_Penalty], t: int) -> List[_Penalty]:
+        """Take out pairs of equal penalties to both teams; they are served with substitutes"""
+        remaining = list(penalties)
+        for penalty in penalties:
+            if penalty not in remaining:
+                continue
+            match = next((other for other in remaining if other.team != penalty.team
+                          and other.length == penalty.length and other.parts == penalty.parts), None)
+            if match is None:
+                continue
+            for coincident in (penalty, match):
+                remaining.remove(coincident)
+                self.penalty_intervals.append({
+                    "team": coincident.team,
+                    "eventId": coincident.event["id"],
+                    "start": t,
+                    "end": t + coincident.length * coincident.parts,
+                    "endedBy": "coincident",
+                    "affectsStrength": False
+                })
+        return remaining
+
+    def state_at(self, t: int) -> Dict[str, TeamState]:
+        """
+        Get the teams on the ice at a game second.
+
+        Args:
+            t: Game second
+
+        Returns:
+            dict: (skaters, goalie in net) for "home" and "away"
+        """
+        index = bisect.bisect_right(self._segment_starts, t) - 1
+        return self._segment_states[max(index, 0)]
+
+    def strength_at(self, t: int) -> str:
+        """
+        Get the strength at a game second, e.g. "5v4" (home skaters first).
+
+        Args:
+            t: Game second
+
+        Returns:
+            str: Skaters of the home and the away team
+        """
+        current = self.state_at(t)
+        return f"{current['home'][0]}v{current['away'][0]}"
+
+    def segments(self) -> List[Dict[str, Any]]:
+        """
+        Get the piecewise strength of the game.
+
+        Returns:
+            List of {"start", "end", "strength", "homeGoalie", "awayGoalie"}
+        """
+        result = []
+        for index, start in enumerate(self._segment_starts):
+            end = self._segment_starts[index + 1] if index + 1 < len(self._segment_starts) else self.end
+            if end <= start:
+                continue
+            current = self._segment_states[index]
+            result.append({
+                "start": start,
+                "end": end,
+                "strength": f"{current['home'][0]}v{current['away'][0]}",
+                "homeGoalie": current["home"][1],
+                "awayGoalie": current["away"][1]
+            })
+        return result
+
+    def time_in_strength(self) -> Dict[str, int]:
+        """
+        Get the total time played at each strength.
+
+        Returns:
+            dict: Seconds per strength (e.g. {"5v5": 3120, "5v4": 240})
+        """
+        totals: Dict[str, int] = {}
+        for segment in self.segments():
+            totals[segment["strength"]] = totals.get(segment["strength"], 0) + segment["end"] - segment["start"]
+        return totals
+
+    @staticmethod
+    def expected_strength_code(scorer: TeamState, opponent: TeamState) -> str:
+        """Strength code of a goal as reported by the API: "EQ", "PP1", "PP2", "SH1", ..."""
+        difference = scorer[0] - opponent[0]
+        if difference > 0:
+            return f"PP{difference}"
+        if difference < 0:
+            return f"SH{-difference}"
+        return "EQ"
+
+    def validate_goal_strengths(self) -> List[Dict[str, Any]]:
+        """
+        Compare the reconstructed strength of each goal with its reported strength code.
+
+        Returns:
+            List of mismatches with "eventId", "time", "reported" and "expected"
+        """
+        mismatches = []
+        for t, event in zip(self.times, self.events):
+            reported = event.get("strength")
+            if event["type"] != "goal" or not reported or event["id"] not in self.goal_states:
+                continue
+            current = self.goal_states[event["id"]]
+            opponent = "away" if event["team"] == "home" else "home"
+            expected = self.expected_strength_code(current[event["team"]], current[opponent])
+
+            # Codes like "PP" without a number only state the kind of strength
+            code = reported.upper()
+            if not code.startswith(("EQ", "PP", "SH")):
+                continue
+            if code[:2] != expected[:2] or (len(code) > 2 and code != expected):
+                mismatches.append({
+                    "eventId": event["id"],
+                    "time": format_clock(t),
+                    "reported": reported,
+                    "expected": expected
+                })
+        return mismatches
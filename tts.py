@@ -0,0 +1,426 @@
+import itertools
+import json
+import os
+import queue
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+from metrics import metrics
+from tts_cache import AudioCache
+
+
+# Long official team names are shortened before synthesis, they read better
+DEFAULT_SUBSTITUTIONS = {
+    "Haninge Anchors HC Röd": "Haninge",
+    "IFK Österåker Hockey": "Österåker"
+}
+
+
+class TextSubstitutions:
+    """
+    Replaces phrases in announcement text in a single pass.
+
+    All phrases are compiled into one regular expression, longest first, so the
+    text is scanned once regardless of the size of the table.
+    """
+
+    def __init__(self, table: Dict[str, str]):
+        """
+        Initialize the substitution table.
+
+        Args:
+            table: Phrases mapped to their replacements
+        """
+        self.table = dict(table)
+        phrases = sorted(self.table, key=len, reverse=True)
+        self._pattern = re.compile("|".join(map(re.escape, phrases))) if phrases else None
+
+    @classmethod
+    def from_file(cls, filepath: str) -> "TextSubstitutions":
+        """Load a substitution table from a JSON object file"""
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def apply(self, text: str) -> str:
+        """Replace all phrases in a text"""
+        if self._pattern is None:
+            return text
+        return self._pattern.sub(lambda match: self.table[match.group(0)], text)
+
+
+def load_substitutions() -> TextSubstitutions:
+    """Load the table from TTS_SUBSTITUTIONS_FILE, or use the built-in defaults"""
+    filepath = os.getenv('TTS_SUBSTITUTIONS_FILE')
+    if filepath:
+        return TextSubstitutions.from_file(filepath)
+    return TextSubstitutions(DEFAULT_SUBSTITUTIONS)
+
+
+substitutions = load_substitutions()
+
+
+def prepare_text(text: str) -> str:
+    """Adjust announcement text before synthesis"""
+    return substitutions.apply(text)
+
+
+# Segments end after punctuation, which in lineups is after every player
+SEGMENT_BOUNDARY = re.compile(r"(?<=[,.:;!?])\s+")
+
+
+def split_segments(text: str) -> List[str]:
+    """
+    Split an announcement into sentence or player sized segments.
+
+    Args:
+        text: Prepared announcement text
+
+    Returns:
+        List of segments, e.g. ["Österåker ställer upp med följande lag:", "30 Hugo Jortby,", ...]
+    """
+    segments = []
+    for segment in SEGMENT_BOUNDARY.split(AudioCache.normalize_text(text)):
+        if not segment:
+            continue
+        if segments and not any(c.isalnum() for c in segment):
+            # Lone punctuation left by the templates belongs to the previous segment
+            segments[-1] += segment
+        else:
+            segments.append(segment)
+    return segments
+
+
+def strip_id3(data: bytes) -> bytes:
+    """Remove a leading ID3v2 tag so MP3 clips can be concatenated"""
+    if len(data) < 10 or not data.startswith(b"ID3"):
+        return data
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return data[10 + size + footer:]
+
+
+class TTSBackend(ABC):
+    """
+    Interface for text-to-speech backends.
+    Subclasses turn text into a stream of encoded audio chunks.
+    """
+
+    voice_id = ""
+    model_id = ""
+    output_format = "mp3_44100_128"
+
+    @abstractmethod
+    def synthesize(self, text: str) -> Iterator[bytes]:
+        """
+        Synthesize speech for a text.
+
+        Args:
+            text: Text to be spoken
+
+        Returns:
+            Iterator over encoded audio chunks
+        """
+
+    def cache_key(self, cache: AudioCache, text: str) -> str:
+        """Get the audio cache key for a text synthesized by this backend"""
+        return cache.key_for(text, self.voice_id, self.model_id, self.output_format)
+
+
+class ElevenLabsBackend(TTSBackend):
+    """Text-to-speech through the ElevenLabs API."""
+
+    def __init__(self, api_key: Optional[str] = None, voice_id: str = "FF7KdobWPaiR0vkcALHF",
+                 model_id: str = "eleven_multilingual_v2", output_format: str = "mp3_44100_128"):
+        """
+        Initialize the ElevenLabs backend.
+
+        Args:
+            api_key: ElevenLabs API key, defaults to the ELEVENLABS_API_KEY environment variable
+            voice_id: Voice to speak with (default is a Swedish voice)
+            model_id: Synthesis model
+            output_format: Audio output format
+        """
+        self.api_key = api_key or os.getenv('ELEVENLABS_API_KEY')
+        self.voice_id = voice_id
+        self.model_id = model_id
+        self.output_format = output_format
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        """ElevenLabs client, created on first use"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from elevenlabs.client import ElevenLabs
+                    self._client = ElevenLabs(api_key=self.api_key)
+        return self._client
+
+    def synthesize(self, text: str) -> Iterator[bytes]:
+        """Synthesize speech with ElevenLabs, yielding chunks as they arrive"""
+        return iter(self.client.text_to_speech.convert(
+            text=text,
+            voice_id=self.voice_id,
+            model_id=self.model_id,
+            output_format=self.output_format,
+        ))
+
+
+class StubBackend(TTSBackend):
+    """
+    Offline backend that produces silent MP3 audio.
+    Used for tests and load tests without network access or API costs.
+    """
+
+    # MPEG-1 Layer III, 128 kbit/s, 44.1 kHz, mono, no padding
+    FRAME_HEADER = b"\xff\xfb\x90\xc0"
+    FRAME_SIZE = 417
+
+    voice_id = "stub"
+    model_id = "stub"
+    output_format = "mp3_44100_128"
+
+    def __init__(self, chunk_delay: float = 0.0, frames_per_chunk: int = 8):
+        """
+        Initialize the stub backend.
+
+        Args:
+            chunk_delay: Seconds to wait before each chunk, to imitate synthesis latency
+            frames_per_chunk: Number of MP3 frames in each yielded chunk
+        """
+        self.chunk_delay = chunk_delay
+        self.frames_per_chunk = frames_per_chunk
+        self._frame = self.FRAME_HEADER + bytes(self.FRAME_SIZE - len(self.FRAME_HEADER))
+
+    def synthesize(self, text: str) -> Iterator[bytes]:
+        """Yield roughly one second of silence per 15 characters of text"""
+        frames = max(1, len(text) * 38 // 15)  # 38 frames per second
+        for start in range(0, frames, self.frames_per_chunk):
+            if self.chunk_delay:
+                time.sleep(self.chunk_delay)
+            yield self._frame * min(self.frames_per_chunk, frames - start)
+
+
+def make_backend(name: Optional[str] = None) -> TTSBackend:
+    """
+    Create a TTS backend by name.
+
+    Args:
+        name: "elevenlabs" or "stub", defaults to the TTS_BACKEND environment variable
+
+    Returns:
+        TTSBackend: The configured backend
+    """
+    name = name or os.getenv('TTS_BACKEND', 'elevenlabs')
+    if name == "elevenlabs":
+        return ElevenLabsBackend()
+    if name == "stub":
+        return StubBackend(chunk_delay=float(os.getenv('TTS_STUB_DELAY', '0')))
+    raise ValueError(f"Unknown TTS backend: {name}")
+
+
+def synthesize_to_cache(backend: TTSBackend, cache: AudioCache, text: str) -> str:
+    """
+    Synthesize a text and store the complete audio in the cache.
+
+    Args:
+        backend: Backend used for synthesis
+        cache: Cache to store the audio in
+        text: Prepared text to be spoken
+
+    Returns:
+        str: Path to the cached audio file
+    """
+    writer = cache.writer(backend.cache_key(cache, text))
+    try:
+        for chunk in backend.synthesize(text):
+            writer.write(chunk)
+        if not writer.size:
+            raise ValueError("Speech synthesis returned no audio")
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.commit()
+
+
+class Presynthesizer:
+    """
+    Synthesizes announcements in the background before anyone presses play.
+
+    Texts are queued with a priority and handled by a fixed number of worker
+    threads. The queue is bounded; when it is full new texts are dropped and
+    will simply be synthesized on demand.
+    """
+
+    # Lower values are synthesized first
+    PRIORITIES = {
+        "goal": 0,
+        "penalty": 1,
+        "goalie-in": 2,
+        "goalie-out": 2,
+        "timeout": 3
+    }
+
+    def __init__(self, backend: TTSBackend, cache: AudioCache, workers: int = 2, max_pending: int = 64):
+        """
+        Initialize the presynthesizer and start its worker threads.
+
+        Args:
+            backend: Backend used for synthesis
+            cache: Cache the audio is stored in
+            workers: Number of worker threads
+            max_pending: Maximum number of queued texts
+        """
+        self.backend = backend
+        self.cache = cache
+        self._queue = queue.PriorityQueue(maxsize=max_pending)
+        self._sequence = itertools.count()
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+        self._threads = []
+
+        for i in range(workers):
+            thread = threading.Thread(target=self._run, name=f"presynth-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, text: str, event_type: Optional[str] = None) -> bool:
+        """
+        Queue an announcement for synthesis.
+
+        Args:
+            text: Announcement text as shown to the operator
+            event_type: Event type used to pick the priority (goals first)
+
+        Returns:
+            bool: True if the text was queued, False if it is cached, already queued or the queue is full
+        """
+        text = prepare_text(text)
+        key = self.backend.cache_key(self.cache, text)
+
+        with self._pending_lock:
+            if key in self._pending or self.cache.contains(key):
+                return False
+            self._pending.add(key)
+
+        priority = self.PRIORITIES.get(event_type, len(self.PRIORITIES))
+        try:
+            self._queue.put_nowait((priority, next(self._sequence), key, text))
+        except queue.Full:
+            with self._pending_lock:
+                self._pending.discard(key)
+            metrics.incr("presynth.dropped")
+            return False
+
+        metrics.incr("presynth.queued")
+        return True
+
+    def _run(self) -> None:
+        """Worker loop synthesizing queued texts"""
+        while True:
+            _, _, key, text = self._queue.get()
+            try:
+                if not self.cache.contains(key):
+                    synthesize_to_cache(self.backend, self.cache, text)
+                    metrics.incr("presynth.synthesized")
+            except Exception:
+                metrics.incr("presynth.errors")
+            finally:
+                with self._pending_lock:
+                    self._pending.discard(key)
+                self._queue.task_done()
+
+    def join(self) -> None:
+        """Block until all queued texts have been handled"""
+        self._queue.join()
+
+
+class SegmentSynthesizer:
+    """
+    Assembles long announcements (lineups, welcome) from individually cached segments.
+
+    Each segment is synthesized and cached on its own, in parallel, so player
+    names that recur across games are only ever synthesized once. The segments
+    are concatenated into one MP3 stream in their original order.
+    """
+
+    def __init__(self, backend: TTSBackend, cache: AudioCache, workers: int = 4):
+        """
+        Initialize the segment synthesizer.
+
+        Args:
+            backend: Backend used for synthesis
+            cache: Cache the segment audio is stored in
+            workers: Maximum number of segments synthesized at the same time
+        """
+        self.backend = backend
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts-segment")
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+
+    def cache_key(self, cache: AudioCache, text: str) -> str:
+        """
+        Get the audio cache key for a whole text assembled from segments.
+
+        The model component is marked, so assembled audio and audio synthesized
+        from the whole text are never served for each other.
+        """
+        backend = self.backend
+        return cache.key_for(text, backend.voice_id, f"{backend.model_id}+segments", backend.output_format)
+
+    def _ensure(self, text: str) -> Future:
+        """Get a future for the cached audio path of a segment"""
+        key = self.backend.cache_key(self.cache, text)
+        path = self.cache.get(key)
+        if path is not None:
+            future = Future()
+            future.set_result(path)
+            return future
+
+        with self._inflight_lock:
+            # Requests for the same segment share one synthesis
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._executor.submit(self._synthesize, key, text)
+                self._inflight[key] = future
+        return future
+
+    def _synthesize(self, key: str, text: str) -> str:
+        """Synthesize one segment into the cache"""
+        try:
+            path = synthesize_to_cache(self.backend, self.cache, text)
+            metrics.incr("tts_segments.synthesized")
+            return path
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+    def stream(self, text: str) -> Iterator[bytes]:
+        """
+        Synthesize a prepared text segment by segment.
+
+        Args:
+            text: Prepared announcement text
+
+        Returns:
+            Iterator over MP3 data, one chunk per segment
+        """
+        segments = split_segments(text)
+        futures = [self._ensure(segment) for segment in segments]
+        metrics.incr("tts_segments.requested", len(segments))
+
+        for index, (segment, future) in enumerate(zip(segments, futures)):
+            try:
+                with open(future.result(), 'rb') as f:
+                    data = f.read()
+            except FileNotFoundError:
+                # Evicted in the meantime, synthesize it again
+                with open(synthesize_to_cache(self.backend, self.cache, segment), 'rb') as f:
+                    data = f.read()
+            yield data if index == 0 else strip_id3(data)
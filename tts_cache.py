@@ -0,0 +1,231 @@
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Optional
+
+from metrics import metrics
+
+
+class AudioCache:
+    """
+    Disk-backed, content-addressed cache for synthesized announcement audio.
+
+    Entries are keyed by the normalized text together with the voice, model and
+    output format used for synthesis, so an identical announcement is only sent
+    to the TTS service once. The total size on disk is capped and the least
+    recently used entries are evicted first.
+    """
+
+    def __init__(self, cache_dir: str = "tts_cache", max_bytes: int = 512 * 1024 * 1024):
+        """
+        Initialize the audio cache.
+
+        Args:
+            cache_dir: Directory where audio files are stored
+            max_bytes: Maximum total size of all cached audio files in bytes
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> size in bytes, oldest first
+        self._total_bytes = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self) -> None:
+        """Rebuild the LRU index from the files already on disk"""
+        files = []
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if name.startswith("."):
+                    continue  # Unfinished temporary file
+                stat = os.stat(os.path.join(root, name))
+                files.append((stat.st_mtime, name, stat.st_size))
+
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_bytes += size
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """Normalize text so trivially different inputs share one cache entry"""
+        text = unicodedata.normalize("NFC", text)
+        return re.sub(r"\s+", " ", text).strip()
+
+    def key_for(self, text: str, voice_id: str, model_id: str, output_format: str) -> str:
+        """
+        Compute the cache key for a synthesis request.
+
+        Args:
+            text: Text to be spoken
+            voice_id: TTS voice ID
+            model_id: TTS model ID
+            output_format: Audio output format (e.g., "mp3_44100_128")
+
+        Returns:
+            str: Hex digest identifying the audio content
+        """
+        parts = [self.normalize_text(text), voice_id, model_id, output_format]
+        return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str) -> str:
+        """Get the file path where the audio for a key is stored"""
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def contains(self, key: str) -> bool:
+        """Check whether audio for a key is cached, without counting a hit or miss"""
+        return os.path.exists(self.path_for(key))
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up cached audio and mark it as recently used.
+
+        Args:
+            key: Cache key from key_for()
+
+        Returns:
+            str: Path to the cached audio file, or None on a cache miss
+        """
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            with self._lock:
+                # Another worker process may have evicted the file
+                size = self._entries.pop(key, None)
+                if size is not None:
+                    self._total_bytes -= size
+            metrics.incr("tts_cache.misses")
+            return None
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            else:
+                # Written by another worker process sharing the directory
+                size = os.path.getsize(path)
+                self._entries[key] = size
+                self._total_bytes += size
+
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+        metrics.incr("tts_cache.hits")
+        return path
+
+    def put(self, key: str, data: bytes) -> str:
+        """
+        Store audio in the cache.
+
+        The file is written to a temporary name and atomically renamed, so
+        readers never see a partially written file.
+
+        Args:
+            key: Cache key from key_for()
+            data: Complete audio content
+
+        Returns:
+            str: Path to the cached audio file
+        """
+        writer = self.writer(key)
+        try:
+            writer.write(data)
+        except BaseException:
+            writer.abort()
+            raise
+        return writer.commit()
+
+    def writer(self, key: str) -> "CacheWriter":
+        """
+        Open an incremental writer for audio that arrives in chunks.
+
+        Args:
+            key: Cache key from key_for()
+
+        Returns:
+            CacheWriter: Writer that must be committed or aborted
+        """
+        return CacheWriter(self, key)
+
+    def _add_entry(self, key: str, size: int) -> None:
+        """Record a stored entry and evict old entries above the size cap"""
+        evicted = []
+        with self._lock:
+            self._total_bytes -= self._entries.pop(key, 0)
+            self._entries[key] = size
+            self._total_bytes += size
+
+            while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                old_key, old_size = self._entries.popitem(last=False)
+                self._total_bytes -= old_size
+                evicted.append(old_key)
+
+        for old_key in evicted:
+            try:
+                os.remove(self.path_for(old_key))
+            except FileNotFoundError:
+                pass
+            metrics.incr("tts_cache.evictions")
+
+    def stats(self) -> dict:
+        """Get the number of entries and total size of the cache"""
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._total_bytes}
+
+
+class CacheWriter:
+    """
+    Writes one cache entry chunk by chunk into a temporary file.
+
+    The entry only becomes visible when commit() atomically renames the file
+    into place; abort() discards it, e.g. when a stream is interrupted.
+    """
+
+    def __init__(self, cache: AudioCache, key: str):
+        """
+        Initialize the writer.
+
+        Args:
+            cache: Cache the entry belongs to
+            key: Cache key from AudioCache.key_for()
+        """
+        self.cache = cache
+        self.key = key
+        self.path = cache.path_for(key)
+        self.size = 0
+
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        fd, self._tmp_path = tempfile.mkstemp(prefix=".", dir=directory)
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, chunk: bytes) -> None:
+        """Append a chunk of audio to the entry"""
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    def commit(self) -> str:
+        """
+        Publish the entry in the cache.
+
+        Returns:
+            str: Path to the cached audio file
+        """
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+        self.cache._add_entry(self.key, self.size)
+        metrics.incr("tts_cache.writes")
+        return self.path
+
+    def abort(self) -> None:
+        """Discard the partially written entry"""
+        self._file.close()
+        try:
+            os.unlink(self._tmp_path)
+        except FileNotFoundError:
+            pass